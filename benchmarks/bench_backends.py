@@ -0,0 +1,58 @@
+"""Compares the throughput and parsing parity of the text extraction backends on a folder of statements.
+
+Usage:
+    >> python benchmarks/bench_backends.py ChaseChecking "path/to/statements/chase"
+"""
+import argparse
+import time
+from pathlib import Path
+
+from heist import backend, finance, pdf
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("statement", help="The name of the statement class in heist.finance, Ex. 'ChaseChecking'.")
+    parser.add_argument("folder", type=Path, help="The folder containing the PDF statements.")
+    args = parser.parse_args()
+
+    statement: type[finance.BaseStatement] = getattr(finance, args.statement)
+    pdf_files: list[Path] = sorted(args.folder.glob("*.pdf"))
+
+    # measure the extraction itself, not the text cache
+    pdf.set_cache(None)
+
+    results: dict[str, dict[Path, list]] = {}
+
+    for name in ("poppler", "pypdf"):
+        if not backend.get(name).available():
+            print(f"{name:>8}: not available")
+            continue
+
+        cls = type(statement.__name__, (statement,), {"__backend__": name})
+        results[name] = {}
+        pages: int = 0
+
+        start: float = time.perf_counter()
+        for pdf_file in pdf_files:
+            document = cls(pdf_file)
+            results[name][pdf_file] = document.transactions
+            pages += document.page_count
+        elapsed: float = time.perf_counter() - start
+
+        print(f"{name:>8}: {len(pdf_files)} files, {pages} pages in {elapsed:.3f}s - {pages / elapsed:.1f} pages/s")
+
+    if len(results) < 2:
+        return
+
+    poppler, pypdf = results["poppler"], results["pypdf"]
+    matched: int = sum(1 for pdf_file in pdf_files if poppler[pdf_file] == pypdf[pdf_file])
+    print(f"  parity: {matched} of {len(pdf_files)} files parsed to identical transactions")
+
+    for pdf_file in pdf_files:
+        if poppler[pdf_file] != pypdf[pdf_file]:
+            print(f"    {pdf_file.name}: poppler={len(poppler[pdf_file])} pypdf={len(pypdf[pdf_file])} transactions")
+
+
+if __name__ == "__main__":
+    main()
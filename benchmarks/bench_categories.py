@@ -0,0 +1,49 @@
+"""Measures categorizing transactions against many category rules, comparing one `search_transactions` scan
+per category against a single pass of `Matcher.categorize`.
+
+Usage:
+    >> python benchmarks/bench_categories.py --categories 200 --transactions 50000
+"""
+import argparse
+import logging
+import random
+import time
+
+from heist import finance
+from heist.matcher import Matcher
+from heist.transaction import Transaction
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=200, help="The number of category rules.")
+    parser.add_argument("--transactions", type=int, default=50000, help="The number of transactions.")
+    parser.add_argument("--merchants", type=int, default=2000, help="The number of distinct descriptions.")
+    args = parser.parse_args()
+
+    # the search logs every query, which is not what is being measured
+    logging.disable(logging.INFO)
+
+    random.seed(0)
+    rules: dict[str, list[str]] = {f"category_{i}": [f"merchant{i}x", f"store{i}y"] for i in range(args.categories)}
+    descriptions: list[str] = [f"POS {random.choice(['MERCHANT', 'STORE', 'SHOP'])}{i % (args.categories * 2)}"
+                               f"{random.choice('XY')} #{i}" for i in range(args.merchants)]
+    transactions: list[Transaction] = [Transaction("bank", "01/01", random.choice(descriptions), 1.0)
+                                       for _ in range(args.transactions)]
+
+    start: float = time.perf_counter()
+    for wildcards in rules.values():
+        finance.search_transactions(wildcards, transactions)
+    elapsed: float = time.perf_counter() - start
+    print(f"{'search per category':>20}: {args.transactions / elapsed:,.0f} transactions/s")
+
+    start = time.perf_counter()
+    categories: Matcher = Matcher(rules)
+    for _ in categories.categorize(transactions):
+        pass
+    elapsed = time.perf_counter() - start
+    print(f"{'single pass':>20}: {args.transactions / elapsed:,.0f} transactions/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measures the lines per second of `utils.replace_ligatures` on realistic pdftotext output, comparing the
+translation table against the previous dict of sequential `str.replace` passes.
+
+Usage:
+    >> python benchmarks/bench_ligatures.py --lines 100000
+"""
+import argparse
+import random
+import time
+
+from heist import utils
+
+
+def _replace_sequential(text: str) -> str:
+    ligatures: dict[str, str] = {
+        "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl", "ﬅ": "ft", "ﬆ": "st", "Ꜳ": "AA", "Æ": "AE",
+        "ꜳ": "aa", "â": "a", "€": "E", "¢": "c", "•": "*", "™": "TM", "®": "(R)", "©": "(C)",
+    }
+
+    for search, replace in ligatures.items():
+        text = text.replace(search, replace)
+
+    return text
+
+
+def _synthetic_lines(count: int) -> list[str]:
+    """Builds statement lines where roughly one in twenty has a ligature or symbol, like pdftotext output."""
+    rng = random.Random(0)
+    lines: list[str] = []
+
+    for i in range(count):
+        line: str = f"{rng.randint(1, 12):02}/{rng.randint(1, 28):02}     MERCHANT NAME {i}          -{rng.uniform(1, 500):,.2f}"
+        if i % 20 == 0:
+            line = line.replace("NAME", rng.choice(["Oﬃce", "Caﬁ•", "Store™", "Proﬁle®"]))
+        lines.append(line)
+
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100000, help="The number of synthetic lines.")
+    args = parser.parse_args()
+
+    lines: list[str] = _synthetic_lines(args.lines)
+
+    if [_replace_sequential(line) for line in lines] != [utils.replace_ligatures(line) for line in lines]:
+        raise RuntimeError("the two approaches replaced different text")
+
+    for name, func in (("before", _replace_sequential), ("after", utils.replace_ligatures)):
+        start: float = time.perf_counter()
+        for line in lines:
+            func(line)
+        elapsed: float = time.perf_counter() - start
+
+        print(f"{name:>8}: {len(lines) / elapsed:,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Compares the latency and memory of counting the pages of statements with a kept-alive PdfReader,
+the way PdfFile used to, against the cheap page tree count used now.
+
+Usage:
+    >> python benchmarks/bench_page_count.py "path/to/statements/chase"
+"""
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import pypdf
+
+from heist import pdf
+
+
+def _reader_count(pdf_file: Path) -> object:
+    reader = pypdf.PdfReader(pdf_file)
+    reader.get_num_pages()
+    return reader
+
+
+def _tree_count(pdf_file: Path) -> object:
+    return pdf.count_pages(pdf_file)
+
+
+def _measure(name: str, func: Callable[[Path], object], pdf_files: list[Path]) -> None:
+    # keep every result alive, like the PdfFile instances of a batch would
+    kept: list[object] = []
+
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    for pdf_file in pdf_files:
+        kept.append(func(pdf_file))
+    elapsed: float = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count: int = len(pdf_files)
+    print(f"{name:>12}: {elapsed / count * 1000:.3f}ms and {current / count / 1024:.1f}KB retained per statement")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", type=Path, help="The folder containing the PDF statements.")
+    args = parser.parse_args()
+
+    pdf_files: list[Path] = sorted(args.folder.glob("*.pdf"))
+
+    if not pdf_files:
+        print(f"no PDF files found: {args.folder}")
+        return
+
+    _measure("PdfReader", _reader_count, pdf_files)
+    _measure("page tree", _tree_count, pdf_files)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Measures the values per second of amount and month name parsing in `utils`, comparing the table-driven
+parsers against the previous per-call regex versions.
+
+Usage:
+    >> python benchmarks/bench_parsing.py --count 1000000
+"""
+import argparse
+import random
+import re
+import time
+from collections.abc import Callable
+
+from heist import utils
+
+
+def _cast_float_regex(text: str, absolute: bool = False) -> float:
+    value: float = float(re.sub(r"[$, _*]", "", text))
+    return abs(value) if absolute else value
+
+
+def _convert_date_regex(date_str: str) -> str:
+    month, day = date_str.split(" ")[:2]
+    months: list[str] = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+    find: re.Match | None = re.compile("|".join(months), flags=re.IGNORECASE).match(month)
+
+    if find is None:
+        raise ValueError(f"invalid month: {month}")
+
+    return f"{str(months.index(find.group().lower()) + 1).zfill(2)}/{day}"
+
+
+def _measure(name: str, func: Callable[[str], object], values: list[str]) -> None:
+    start: float = time.perf_counter()
+    for value in values:
+        func(value)
+    elapsed: float = time.perf_counter() - start
+
+    print(f"{name:>24}: {len(values) / elapsed:,.0f} values/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000, help="The number of values to parse.")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    amounts: list[str] = [f"{rng.choice(['', '-', '$'])}{rng.uniform(0, 5000):,.2f}" for _ in range(args.count)]
+    dates: list[str] = [f"{rng.choice(['Jan', 'Feb', 'Mar', 'Sep', 'December'])} {rng.randint(1, 28):02}" for _ in range(args.count)]
+
+    _measure("cast_float (regex)", _cast_float_regex, amounts)
+    _measure("cast_float", utils.cast_float, amounts)
+    _measure("cast_cents", utils.cast_cents, amounts)
+    _measure("convert_date (regex)", _convert_date_regex, dates)
+    _measure("convert_date", utils.convert_date, dates)
+    _measure("convert_date (iso)", lambda d: utils.convert_date(d, year=2024), dates)
+
+
+if __name__ == "__main__":
+    main()
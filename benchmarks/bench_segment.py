@@ -0,0 +1,68 @@
+"""Measures the pages per second of splitting statement text into pages, comparing the single-pass segmenter
+against the previous two-pass version on long documents.
+
+Usage:
+    >> python benchmarks/bench_segment.py --pages 500 --lines 60
+"""
+import argparse
+import re
+import time
+
+from heist import pdf
+
+
+def _text_to_dict_two_pass(text: list[str]) -> dict[str, list[str]]:
+    dict_pages: dict[str, list[str]] = {}
+    page_blocks: list[tuple[int, int]] = []
+    start_index: int = 0
+
+    for i, line in enumerate(text):
+        if not re.search(pdf.PdfFile.__re_page_end__, line, flags=re.IGNORECASE):
+            continue
+
+        page_blocks.append((start_index, i))
+        start_index = i + 1
+
+    for i, (start, end) in enumerate(page_blocks):
+        dict_pages.setdefault(str(i + 1), text[start:end])
+
+    return dict_pages
+
+
+def _document(pages: int, lines: int) -> list[str]:
+    text: list[str] = []
+
+    for page in range(1, pages + 1):
+        text.extend(f"01/{page % 28 + 1:02d}  CARD PURCHASE {page}-{line} STORE #{line:04d}  -{line}.{page % 100:02d}"
+                    for line in range(lines))
+        text.append(f"Page {page} of {pages}")
+
+    return text
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=500, help="The number of pages in the document.")
+    parser.add_argument("--lines", type=int, default=60, help="The number of lines on each page.")
+    parser.add_argument("--repeat", type=int, default=20, help="The number of times the document is split.")
+    args = parser.parse_args()
+
+    text: list[str] = _document(args.pages, args.lines)
+
+    # a bare instance, the segmenter only needs the page end pattern
+    document: pdf.PdfFile = pdf.PdfFile.__new__(pdf.PdfFile)
+
+    if _text_to_dict_two_pass(text) != document._text_to_dict(text):
+        raise AssertionError("the segmenters split the pages differently")
+
+    for name, func in (("two-pass", _text_to_dict_two_pass), ("single-pass", document._text_to_dict)):
+        start: float = time.perf_counter()
+        for _ in range(args.repeat):
+            func(text)
+        elapsed: float = time.perf_counter() - start
+
+        print(f"{name:>12}: {args.pages * args.repeat / elapsed:,.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
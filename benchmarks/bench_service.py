@@ -0,0 +1,57 @@
+"""Compares the throughput of a pool started per folder with the resident extraction service.
+
+Usage:
+    >> python benchmarks/bench_service.py ChaseChecking "path/to/statements/chase" --workers 4 --rounds 3
+"""
+import argparse
+import time
+from pathlib import Path
+
+from heist import expense, finance, pdf
+from heist.service import ExtractionService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("statement", help="The name of the statement class in heist.finance, Ex. 'ChaseChecking'.")
+    parser.add_argument("folder", type=Path, help="The folder containing the PDF statements.")
+    parser.add_argument("--workers", type=int, default=4, help="The number of worker processes.")
+    parser.add_argument("--rounds", type=int, default=3, help="The number of times the folder is read, like reading several folders.")
+    parser.add_argument("--batch-size", type=int, default=8, help="The number of statements sent to a worker at a time.")
+    args = parser.parse_args()
+
+    statement: type[finance.BaseStatement] = getattr(finance, args.statement)
+    pdf_files: list[Path] = sorted(args.folder.glob("*.pdf"))
+    total: int = len(pdf_files) * args.rounds
+
+    # measure the extraction itself, not the text cache
+    pdf.set_cache(None)
+
+    def _report(name: str, elapsed: float) -> None:
+        print(f"{name:>18}: {total} statements in {elapsed:.3f}s - {total / elapsed:.1f} statements/s")
+
+    start: float = time.perf_counter()
+    for _ in range(args.rounds):
+        expense.read_statements(statement, args.folder, workers=1)
+    _report("serial", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        expense.read_statements(statement, args.folder, workers=args.workers)
+    _report("pool per folder", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ExtractionService(workers=args.workers, batch_size=args.batch_size, cache=False) as service:
+        for _ in range(args.rounds):
+            expense.read_statements(statement, args.folder, service=service)
+    _report("service", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ExtractionService(workers=args.workers, batch_size=args.batch_size, cache=False) as service:
+        for _ in service.map([(statement, pdf_file) for _ in range(args.rounds) for pdf_file in pdf_files]):
+            pass
+    _report("service batched", time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measures the per-line cost of matching and parsing transactions on a synthetic statement, comparing
+the compiled single-pass match against matching each line twice with the raw pattern strings.
+
+Usage:
+    >> python benchmarks/bench_transactions.py --lines 5000
+"""
+import argparse
+import random
+import re
+import time
+
+from heist import finance, utils
+
+
+def _synthetic_lines(count: int) -> list[str]:
+    """Builds a mix of Chase checking transaction lines and the headers and totals between them."""
+    rng = random.Random(0)
+    merchants: list[str] = ["COFFEE SHOP", "AMZN Mktp US*2K4", "NETFLIX.COM", "SHELL OIL 5744", "PAYROLL DEPOSIT"]
+    lines: list[str] = []
+
+    for i in range(count):
+        if i % 4 == 3:
+            lines.append("Total Deposits and Additions                                   $1,234.56")
+            continue
+
+        amount: float = rng.uniform(1, 500)
+        lines.append(f"{rng.randint(1, 12):02}/{rng.randint(1, 28):02}     {rng.choice(merchants)} {i}"
+                     f"          -{amount:,.2f}          {amount * 10:,.2f}")
+
+    return lines
+
+
+def _two_pass(statement: finance.ChaseChecking, lines: list[str]) -> list[dict]:
+    output: list[dict] = []
+
+    for line in lines:
+        text: str = line.strip().replace("\r", "").replace("\n", "")
+        if not re.match(statement.__re_transaction__, text):
+            continue
+
+        match: re.Match = re.match(statement.__re_transaction__, line, flags=re.IGNORECASE)
+        desc: str = " ".join(list(filter(None, match.group("desc").split(" "))))
+        amount: float = utils.cast_float(match.group("amount"), absolute=True)
+        output.append(dict(zip(["bank", "date", "description", "amount"], [statement.bank_name, match.group("date"), desc, amount])))
+
+    return output
+
+
+def _single_pass(statement: finance.ChaseChecking, lines: list[str]) -> list[dict]:
+    output: list[dict] = []
+
+    for line in lines:
+        match: re.Match | None = statement._match_transaction(line)
+        if match is None:
+            continue
+        output.append(statement._parse_transaction(line, match=match))
+
+    return output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=5000, help="The number of lines in the synthetic statement.")
+    parser.add_argument("--repeat", type=int, default=20, help="The number of times each approach is run.")
+    args = parser.parse_args()
+
+    lines: list[str] = _synthetic_lines(args.lines)
+
+    # the parsing methods do not touch the PDF, so the statement does not need a file
+    statement: finance.ChaseChecking = finance.ChaseChecking.__new__(finance.ChaseChecking)
+
+    if _two_pass(statement, lines) != _single_pass(statement, lines):
+        raise RuntimeError("the two approaches parsed different transactions")
+
+    for name, func in (("two pass", _two_pass), ("single pass", _single_pass)):
+        start: float = time.perf_counter()
+        for _ in range(args.repeat):
+            func(statement, lines)
+        elapsed: float = time.perf_counter() - start
+
+        print(f"{name:>12}: {elapsed / (args.repeat * len(lines)) * 1e6:.3f}us per line")
+
+
+if __name__ == "__main__":
+    main()
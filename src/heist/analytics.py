@@ -0,0 +1,154 @@
+"""Heist: Transaction Analytics
+Turns parsed transactions into typed NumPy columns, so totals per bank, month or category and rolling
+sums are computed with vectorized operations instead of looping over the rows.
+
+NumPy is an optional dependency, install it with the 'analytics' extra:
+    >> uv sync --extra analytics
+"""
+from collections.abc import Iterable, Mapping
+
+from heist import utils
+from heist.matcher import Matcher
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# dates without a year are placed in year 1, which is not a leap year, so they keep a 365 day calendar
+_undated_year: int = 1
+
+
+class TransactionColumns:
+    """The transactions stored as typed NumPy columns.
+
+    `amount` is float64, `date` is an int32 from `utils.date_to_int`, `year` is int16 and is 0 when the
+    statement did not include it, `month` and `day` are int8, and `bank` is an int32 code into `banks`.
+    The descriptions are kept as an object array, so they can be classified by a matcher.
+    """
+
+    def __init__(self, transactions: Iterable[Mapping]) -> None:
+        """The transactions stored as typed NumPy columns.
+
+        Args:
+            transactions (Iterable[Transaction]): The transactions to convert.
+        """
+        if np is None:
+            raise ImportError("numpy is required for heist.analytics, install it with 'uv sync --extra analytics'.")
+
+        rows: list[Mapping] = list(transactions)
+
+        self.amount: np.ndarray = np.fromiter((row["amount"] for row in rows), dtype=np.float64, count=len(rows))
+
+        self.date: np.ndarray = np.fromiter((utils.date_to_int(row["date"]) for row in rows), dtype=np.int32, count=len(rows))
+        self.year: np.ndarray = (self.date // 10000).astype(np.int16)
+        self.month: np.ndarray = (self.date // 100 % 100).astype(np.int8)
+        self.day: np.ndarray = (self.date % 100).astype(np.int8)
+
+        self.banks, bank_codes = np.unique(np.array([row["bank"] for row in rows], dtype=object), return_inverse=True)
+        self.bank: np.ndarray = bank_codes.astype(np.int32)
+
+        self.description: np.ndarray = np.array([row["description"] for row in rows], dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(rows={len(self)}, banks={list(self.banks)})"
+
+    @property
+    def days(self) -> np.ndarray:
+        """Returns the calendar day of each transaction as a datetime64, dates without a year are placed in year 1."""
+        year: np.ndarray = np.where(self.year > 0, self.year, _undated_year).astype(np.int64)
+        months: np.ndarray = ((year - 1970) * 12 + self.month - 1).astype("datetime64[M]")
+        return months.astype("datetime64[D]") + (self.day.astype(np.int64) - 1)
+
+    @property
+    def day_of_year(self) -> np.ndarray:
+        """Returns the day of the year of each transaction, starting at 0 for January 1st."""
+        days: np.ndarray = self.days
+        return (days - days.astype("datetime64[Y]").astype("datetime64[D]")).astype(np.int16)
+
+    @property
+    def start(self) -> np.datetime64:
+        """Returns the first day of `daily_totals` and `rolling_sum`, the day of the earliest transaction."""
+        return self.days.min()
+
+    def total(self) -> float:
+        """Returns the sum of every amount."""
+        return float(self.amount.sum())
+
+    def totals_by_bank(self) -> dict[str, float]:
+        """Sums the amounts of each bank.
+
+        Returns:
+            (dict[str, float]) The total amount of each bank.
+        """
+        totals: np.ndarray = np.bincount(self.bank, weights=self.amount, minlength=len(self.banks))
+        return dict(zip(self.banks.tolist(), totals.tolist()))
+
+    def totals_by_month(self) -> dict[int, float]:
+        """Sums the amounts of each month, the same month of different years is summed separately.
+
+        Returns:
+            (dict[int, float]) The total amount of each month that has transactions, keyed as YYYYMM, or 1 to 12
+                for the transactions without a year.
+        """
+        months, codes = np.unique(self.year.astype(np.int32) * 100 + self.month, return_inverse=True)
+        totals: np.ndarray = np.bincount(codes, weights=self.amount, minlength=len(months))
+        return dict(zip(months.tolist(), totals.tolist()))
+
+    def daily_totals(self) -> np.ndarray:
+        """Sums the amounts of each day, from the earliest transaction to the latest.
+
+        Returns:
+            (np.ndarray) The total of each day, indexed by the days since `start`.
+        """
+        if not len(self):
+            return np.zeros(0, dtype=np.float64)
+
+        days: np.ndarray = self.days
+        return np.bincount((days - days.min()).astype(np.int64), weights=self.amount)
+
+    def rolling_sum(self, window: int = 30) -> np.ndarray:
+        """Sums the amounts over a trailing window of days.
+
+        Args:
+            window (int, optional):  The number of days in the window. Default is 30.
+
+        Returns:
+            (np.ndarray) The sum of each day, indexed by the days since `start`, including that day and the days
+                before it.
+        """
+        cumulative: np.ndarray = np.concatenate(([0.0], np.cumsum(self.daily_totals())))
+        end: np.ndarray = np.arange(1, len(cumulative))
+        return cumulative[end] - cumulative[np.maximum(end - window, 0)]
+
+    def categories(self, matcher: Matcher, default: str = "") -> np.ndarray:
+        """Classifies each transaction by the first query of the matcher its description matches.
+
+        Args:
+            matcher (Matcher): The named queries to classify the descriptions with.
+            default (str, optional):  The category of transactions that match no query. Default is ''.
+
+        Returns:
+            (np.ndarray) The category of each transaction.
+        """
+        # classify each distinct description once, then broadcast the result back to the rows
+        unique, inverse = np.unique(self.description, return_inverse=True)
+        labels: list[str] = [matcher.first(desc) or default for desc in unique]
+        return np.asarray(labels, dtype=object)[inverse]
+
+    def totals_by_category(self, matcher: Matcher, default: str = "") -> dict[str, float]:
+        """Sums the amounts of each category.
+
+        Args:
+            matcher (Matcher): The named queries to classify the descriptions with.
+            default (str, optional):  The category of transactions that match no query. Default is ''.
+
+        Returns:
+            (dict[str, float]) The total amount of each category.
+        """
+        names, codes = np.unique(self.categories(matcher, default=default), return_inverse=True)
+        totals: np.ndarray = np.bincount(codes, weights=self.amount, minlength=len(names))
+        return dict(zip(names.tolist(), totals.tolist()))
@@ -0,0 +1,203 @@
+"""Heist: Text Extraction Backends
+A backend extracts the raw lines of text from a range of pages in a PDF. The poppler backend runs the
+pdftotext executable, the pypdf backend extracts the text in process, which avoids spawning a process
+per statement and works on hosts without poppler installed.
+"""
+import asyncio
+import io
+import shutil
+import subprocess
+from collections.abc import Iterator
+from pathlib import Path
+
+import pypdf
+
+from heist import logger, settings
+
+_logger = logger.get(__name__)
+
+
+class Backend:
+    """Extracts the raw lines of text from a PDF.
+
+    Lines are yielded with their line endings, the way they are read from a text file. When page
+    breaks are kept, each page ends with a form feed character, matching the pdftotext output.
+    """
+
+    name: str = ""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+    def available(self) -> bool:
+        """Checks if the backend can be used on this host.
+
+        Returns:
+            (bool) True if the backend is available, otherwise False.
+        """
+        raise NotImplementedError
+
+    def extract(self, pdf_file: Path, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> Iterator[str]:
+        """Extracts the text from a range of pages in the PDF.
+
+        Args:
+            pdf_file (Path): The path to the PDF file.
+            start_page (int): The first page to extract.
+            end_page (int): The last page to extract.
+            layout (bool, optional):  Whether to keep the physical layout of the text. Default is True.
+            page_break (bool, optional):  Whether to remove page breaks in the text. Default is True.
+
+        Returns:
+            (Iterator[str]) The raw lines of text.
+        """
+        raise NotImplementedError
+
+    async def extract_async(self, pdf_file: Path, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> list[str]:
+        """Extracts the text from a range of pages in the PDF without blocking the event loop.
+
+        Details:
+            By default the extraction runs in a worker thread, backends that spawn processes override
+            this to await them directly.
+
+        Args:
+            pdf_file (Path): The path to the PDF file.
+            start_page (int): The first page to extract.
+            end_page (int): The last page to extract.
+            layout (bool, optional):  Whether to keep the physical layout of the text. Default is True.
+            page_break (bool, optional):  Whether to remove page breaks in the text. Default is True.
+
+        Returns:
+            (list[str]) The raw lines of text.
+        """
+        return await asyncio.to_thread(lambda: list(self.extract(pdf_file, start_page, end_page, layout=layout, page_break=page_break)))
+
+
+class PopplerBackend(Backend):
+    """Extracts text with the pdftotext executable from the Poppler library."""
+
+    name: str = "poppler"
+
+    def __init__(self, executable: str | Path | None = None) -> None:
+        """Extracts text with the pdftotext executable from the Poppler library.
+
+        Args:
+            executable (str | Path, optional):  The path to pdftotext. Default is the 'pdftotext' setting,
+                or the pdftotext found on the PATH.
+        """
+        executable = settings.get("pdftotext") if executable is None else executable
+
+        if executable is None or not Path(executable).is_file():
+            executable = shutil.which("pdftotext")
+
+        self._executable: Path | None = Path(executable) if executable else None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(executable={self._executable})"
+
+    @property
+    def executable(self) -> Path | None:
+        """Returns the path to the pdftotext executable."""
+        return self._executable
+
+    def available(self) -> bool:
+        return self._executable is not None and self._executable.is_file()
+
+    def command(self, pdf_file: Path, output: str, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> list[str]:
+        """Builds the pdftotext command.
+
+        Args:
+            pdf_file (Path): The path to the PDF file.
+            output (str): The path to the text file, or '-' to write the text to stdout.
+            start_page (int): The first page to extract.
+            end_page (int): The last page to extract.
+            layout (bool, optional):  Whether to keep the physical layout of the text. Default is True.
+            page_break (bool, optional):  Whether to remove page breaks in the text. Default is True.
+
+        Returns:
+            (list[str]) The command and its arguments.
+        """
+        command: list[str] = [
+            self._executable.as_posix(),
+            "-f", str(start_page),
+            "-l", str(end_page),
+            "-enc", "UTF-8",
+            "-eol", "dos"
+        ]
+
+        if layout:
+            command.append("-layout")
+
+        if page_break:
+            command.append("-nopgbrk")
+
+        command.extend([pdf_file.as_posix(), output])
+
+        return command
+
+    def extract(self, pdf_file: Path, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> Iterator[str]:
+        command: list[str] = self.command(pdf_file, "-", start_page, end_page, layout=layout, page_break=page_break)
+
+        _logger.debug(f"Run: {command}")
+        with subprocess.Popen(command, stdout=subprocess.PIPE, encoding="utf8") as process:
+            yield from process.stdout
+
+        if process.returncode:
+            raise RuntimeError(f"pdftotext failed with exit code {process.returncode}: {pdf_file}")
+
+    async def extract_async(self, pdf_file: Path, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> list[str]:
+        command: list[str] = self.command(pdf_file, "-", start_page, end_page, layout=layout, page_break=page_break)
+
+        process: asyncio.subprocess.Process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+        stdout, _ = await process.communicate()
+
+        if process.returncode:
+            raise RuntimeError(f"pdftotext failed with exit code {process.returncode}: {pdf_file}")
+
+        # read the lines with universal newlines, the same as the blocking extraction
+        return io.StringIO(stdout.decode("utf8"), newline=None).readlines()
+
+
+class PypdfBackend(Backend):
+    """Extracts text in process with pypdf, using its layout mode to keep the statement columns aligned."""
+
+    name: str = "pypdf"
+
+    def available(self) -> bool:
+        return True
+
+    def extract(self, pdf_file: Path, start_page: int, end_page: int, layout: bool = True, page_break: bool = True) -> Iterator[str]:
+        reader: pypdf.PdfReader = pypdf.PdfReader(pdf_file)
+
+        for page in reader.pages[start_page - 1:end_page]:
+            # blank pages have no content stream, which the layout mode cannot handle
+            text: str = page.extract_text(extraction_mode="layout" if layout else "plain") if "/Contents" in page else ""
+
+            if not page_break:
+                text += "\f"
+
+            for line in text.split("\n"):
+                yield f"{line}\n"
+
+
+_backends: dict[str, type[Backend]] = {
+    PopplerBackend.name: PopplerBackend,
+    PypdfBackend.name: PypdfBackend,
+}
+
+
+def get(name: str | None = None) -> Backend:
+    """Gets a text extraction backend by name.
+
+    Args:
+        name (str, optional):  The name of the backend, 'poppler' or 'pypdf'. Default is the 'backend' setting,
+            falling back to 'poppler'.
+
+    Returns:
+        (Backend) The text extraction backend.
+    """
+    name = (name or settings.get("backend") or PopplerBackend.name).lower()
+
+    if name not in _backends:
+        raise ValueError(f"unknown text extraction backend: {name}, expected one of {list(_backends)}")
+
+    return _backends[name]()
@@ -0,0 +1,192 @@
+"""Heist: Extraction Cache
+Stores the text extracted from PDF files on disk, so unchanged statements never have to be run
+through poppler again. Entries are keyed by the content hash of the PDF and the extraction options,
+and the least recently used entries are evicted once the cache grows past its size limit.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from heist import logger, utils
+
+_logger = logger.get(__name__)
+
+
+class TextCache:
+    """A content-addressed, size capped cache of extracted PDF text.
+
+    Each entry is a single UTF-8 text file named after its key. Reading an entry touches its
+    modification time, which is what the least recently used eviction is ordered by. The size of the
+    cache is scanned once, then kept as a running total of the writes, so the folder is only scanned
+    again when the total goes over the limit. Writes from other processes are picked up by that scan.
+    """
+
+    def __init__(self, folder: str | Path, max_size: int = 256 * 1024 * 1024) -> None:
+        """A content-addressed, size capped cache of extracted PDF text.
+
+        Args:
+            folder (str | Path): The folder the cache entries are stored in.
+            max_size (int, optional):  The maximum size of the cache in bytes. Default is 256MB.
+        """
+        self._folder: Path = Path(folder)
+        self._max_size: int = max_size
+
+        # the running size of the cache, so a write only scans the folder once the cache may be over its limit
+        self._size: int | None = None
+        self._size_lock: threading.Lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(folder={self._folder}, max_size={self._max_size})"
+
+    @property
+    def folder(self) -> Path:
+        """Returns the folder the cache entries are stored in."""
+        return self._folder
+
+    @staticmethod
+    def key(pdf_file: str | Path,
+            start_page: int,
+            end_page: int,
+            layout: bool,
+            page_break: bool,
+            backend: str = "poppler",
+            file_hash: str | None = None) -> str:
+        """Builds the cache key for a PDF file and the options it is extracted with.
+
+        Args:
+            pdf_file (str | Path): The path to the PDF file.
+            start_page (int): The first page extracted.
+            end_page (int): The last page extracted.
+            layout (bool): Whether the text is extracted with the '-layout' option.
+            page_break (bool): Whether page breaks are removed from the text.
+            backend (str): Optional. The name of the backend the text is extracted with. Default is 'poppler'.
+            file_hash (str): Optional. The hash of the PDF file, when it is already known. Default is None, which
+                hashes the file.
+
+        Returns:
+            (str) The cache key.
+        """
+        options: str = f"{file_hash or utils.file_hash(pdf_file)}:{start_page}:{end_page}:{int(layout)}:{int(page_break)}:{backend}"
+        return hashlib.sha256(options.encode("utf8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self._folder.joinpath(f"{key}.txt")
+
+    def get(self, key: str) -> str | None:
+        """Gets the cached text for the key.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            (str | None) The cached text, or None if the key is not cached.
+        """
+        entry: Path = self._entry(key)
+
+        # another process may evict the entry between the read and marking it as recently used
+        try:
+            text: str = entry.read_text(encoding="utf8")
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+
+        return text
+
+    def put(self, key: str, text: str) -> Path:
+        """Stores the text for the key, then evicts old entries if the cache is over its size limit.
+
+        Args:
+            key (str): The cache key.
+            text (str): The text to store.
+
+        Returns:
+            (Path) The path to the cache entry.
+        """
+        self._folder.mkdir(parents=True, exist_ok=True)
+
+        entry: Path = self._entry(key)
+
+        try:
+            replaced: int = entry.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        # write to a temporary file first, so a reader never sees a partially written entry, the temporary
+        # file is unique so threads and processes writing the same key never share one
+        handle, temp_name = tempfile.mkstemp(dir=self._folder, prefix=f"{key}.", suffix=".tmp")
+        temp: Path = Path(temp_name)
+
+        try:
+            with os.fdopen(handle, "w", encoding="utf8") as f:
+                f.write(text)
+
+            temp_size: int = temp.stat().st_size
+            temp.replace(entry)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
+
+        with self._size_lock:
+            if self._size is not None:
+                self._size += temp_size - replaced
+            over: bool = self._size is None or self._size > self._max_size
+
+        if over:
+            self.evict()
+
+        return entry
+
+    def evict(self) -> int:
+        """Removes the least recently used entries until the cache is within its size limit.
+
+        A cache over its limit is trimmed to 90% of it, so the next writes fit without another scan.
+
+        Returns:
+            (int) The number of entries removed.
+        """
+        if not self._folder.is_dir():
+            return 0
+
+        entries: list[tuple[float, int, Path]] = []
+        total: int = 0
+
+        for entry in self._folder.glob("*.txt"):
+            try:
+                stat: os.stat_result = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+
+        removed: int = 0
+        target: int = self._max_size if total <= self._max_size else self._max_size * 9 // 10
+
+        for _, size, entry in sorted(entries):
+            if total <= target:
+                break
+
+            entry.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        with self._size_lock:
+            self._size = total
+
+        if removed:
+            _logger.info(f"Evicted {removed} text cache entries.")
+
+        return removed
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        if not self._folder.is_dir():
+            return
+
+        for entry in self._folder.glob("*.txt"):
+            entry.unlink(missing_ok=True)
+
+        with self._size_lock:
+            self._size = 0
@@ -0,0 +1,216 @@
+"""Heist: Command Line
+The `heist` console script. It reads every statement under the statement folders, detecting the bank of
+each PDF, and runs the same pipeline as `main.py`, with the parallelism, cache and output controlled
+from the command line instead of by editing code.
+
+Usage:
+    >> heist ingest --workers 8
+    >> heist search -q amazon -q amzn --output amazon.csv
+    >> heist export --format npz --output exports
+"""
+import argparse
+import cProfile
+import itertools
+import pstats
+import sys
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+from heist import expense, finance, logger, pdf, settings, sheet
+from heist.finance import TransactionType
+from heist.matcher import Matcher
+from heist.merchant import MerchantTable
+from heist.reconcile import Reconciler, transfer_rows
+from heist.service import ExtractionService
+from heist.store import TransactionStore
+
+_logger = logger.get(__name__)
+
+# csv column sort order based on transaction data
+_sort_list: list[str] = ["bank", "date", "description", "merchant", "category", "amount", "miles"]
+
+
+class _Pipeline:
+    """The resources shared by a command, the store, the warm worker pool and the merchant table."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        incremental: bool = bool(settings.get("store")) if args.incremental is None else args.incremental
+
+        if incremental and not settings.get("store"):
+            raise SystemExit("--incremental needs the 'store' setting in config/settings.yaml")
+
+        if args.cache_dir is not None:
+            pdf.set_cache(args.cache_dir)
+
+        self.store: TransactionStore | None = TransactionStore(settings["store"]) if incremental else None
+        self.service: ExtractionService | None = None
+
+        # a single worker parses in this process, which is also what --profile can see into
+        if args.workers is None or args.workers > 1:
+            self.service = ExtractionService(workers=args.workers, cache_dir=args.cache_dir)
+
+        self.workers: int | None = args.workers
+        self.reconciler: Reconciler = Reconciler()
+        self.merchants: MerchantTable = MerchantTable(settings.get("merchants"))
+        self.categories: Matcher = settings.get("categories") or Matcher({})
+
+    def transactions(self, folders: list[Path], recursive: bool) -> Iterator[TransactionType]:
+        """Streams the reconciled, named and categorized transactions of every statement in the folders.
+
+        Args:
+            folders (list[Path]): The folders containing the PDF statements.
+            recursive (bool): Whether to include the PDF files in sub-folders.
+
+        Returns:
+            (Iterator[Transaction]) The transaction details.
+        """
+        transactions: Iterator[TransactionType] = itertools.chain.from_iterable(
+            expense.iter_folder(folder, workers=self.workers, store=self.store, service=self.service, recursive=recursive)
+            for folder in folders
+        )
+
+        transactions = self.reconciler.dedupe(transactions)
+        transactions = self.merchants.apply(transactions)
+
+        return self.categories.categorize(transactions)
+
+    def close(self) -> None:
+        self.merchants.save()
+
+        if self.service is not None:
+            self.service.close()
+
+        if self.store is not None:
+            self.store.close()
+
+
+def _folders(args: argparse.Namespace) -> list[Path]:
+    return args.folders or [settings["statements"]]
+
+
+def _ingest(args: argparse.Namespace, pipeline: _Pipeline) -> int:
+    counts: dict[str, int] = {}
+
+    for transaction in pipeline.transactions(_folders(args), args.recursive):
+        counts[transaction["bank"]] = counts.get(transaction["bank"], 0) + 1
+
+    for bank, count in sorted(counts.items()):
+        print(f"{bank}: {count} transactions")
+
+    print(f"{pipeline.reconciler.dropped} repeated transactions dropped, "
+          f"{len(pipeline.reconciler.transfers())} transfers between accounts")
+
+    return 0
+
+
+def _search(args: argparse.Namespace, pipeline: _Pipeline) -> int:
+    searches: Matcher = Matcher({"search": args.queries})
+    matches: Iterator[TransactionType] = (t for t in pipeline.transactions(_folders(args), args.recursive)
+                                          if searches.first(t["description"]))
+
+    if args.output is not None:
+        sheet.write_csv(args.output, list(matches), sort_list=_sort_list)
+        return 0
+
+    for transaction in matches:
+        print("\t".join(str(transaction.get(field, "")) for field in ("bank", "date", "description", "amount")))
+
+    return 0
+
+
+def _export(args: argparse.Namespace, pipeline: _Pipeline) -> int:
+    output: Path = args.output or settings["statements"]
+    output.mkdir(parents=True, exist_ok=True)
+
+    transactions: Iterator[TransactionType] = pipeline.transactions(_folders(args), args.recursive)
+
+    if args.format == "npz":
+        all_transactions: Path = sheet.write_npz(output.joinpath("all_transactions.npz"), transactions)
+
+        # the transfers are read back from the npz file, the same as from the csv file
+        transfers: list[dict] = transfer_rows(sheet.read_npz_transactions(all_transactions), pipeline.reconciler.transfers())
+        sheet.write_csv(output.joinpath("transfers.csv"), transfers, sort_list=["transfer"] + _sort_list)
+
+        return 0
+
+    # every csv file is written in a single pass over the transactions
+    filters: dict[Path, Callable[[TransactionType], bool] | None] = {output.joinpath("all_transactions.csv"): None}
+    for name in pipeline.categories.names:
+        filters[output.joinpath(f"{name}.csv")] = lambda item, name=name: item.get("category") == name
+
+    sheet.write_csv_many(filters, transactions, fields=finance.statement_fields() + ["merchant", "category"], sort_list=_sort_list)
+
+    # both sides of each payment between accounts, read back from the csv file rather than kept in memory
+    transfers: list[dict] = transfer_rows(sheet.iter_csv(output.joinpath("all_transactions.csv")), pipeline.reconciler.transfers())
+    sheet.write_csv(output.joinpath("transfers.csv"), transfers, sort_list=["transfer"] + _sort_list)
+
+    return 0
+
+
+def _parser() -> argparse.ArgumentParser:
+    common: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
+    common.add_argument("folders", nargs="*", type=Path,
+                        help="The folders containing the PDF statements. Default is the 'statements' setting.")
+    common.add_argument("--recursive", action=argparse.BooleanOptionalAction, default=True,
+                        help="Whether to include the PDF files in sub-folders. Default is on.")
+    common.add_argument("--workers", type=int,
+                        help="The number of worker processes, 1 parses in this process. Default is the 'workers' setting.")
+    common.add_argument("--cache-dir", type=Path,
+                        help="The folder the extracted text is cached in. Default is the 'cache' setting.")
+    common.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=None,
+                        help="Only parse new or changed statements, using the 'store' setting. Default is on when a store is set.")
+    common.add_argument("--profile", action="store_true",
+                        help="Profile the command and print the slowest calls. Use with --workers 1 to see into the parsing.")
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="heist", description="Extracts expenses from PDF statements.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", parents=[common], help="Parse the statements and report what was found.")
+    ingest.set_defaults(func=_ingest)
+
+    search = commands.add_parser("search", parents=[common], help="Find the transactions matching wildcards.")
+    search.add_argument("--query", "-q", dest="queries", action="append", required=True,
+                        help="A wildcard matched against the description, ignoring case. May be repeated.")
+    search.add_argument("--output", "-o", type=Path, help="Write the matches to this CSV file instead of printing them.")
+    search.set_defaults(func=_search)
+
+    export = commands.add_parser("export", parents=[common], help="Write the transactions to CSV or npz files.")
+    export.add_argument("--format", choices=("csv", "npz"), default="csv", help="The output format. Default is csv.")
+    export.add_argument("--output", "-o", type=Path, help="The output folder. Default is the 'statements' setting.")
+    export.set_defaults(func=_export)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the `heist` console script.
+
+    Args:
+        argv (list[str], optional):  The command line arguments. Default is the arguments of this process.
+
+    Returns:
+        (int) The exit code.
+    """
+    args: argparse.Namespace = _parser().parse_args(argv)
+
+    if args.workers is not None and args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+
+    profiler: cProfile.Profile | None = cProfile.Profile() if args.profile else None
+    pipeline: _Pipeline = _Pipeline(args)
+
+    try:
+        if profiler is not None:
+            profiler.enable()
+
+        return args.func(args, pipeline)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            pstats.Stats(profiler, stream=sys.stderr).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(25)
+
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,14 @@ from pathlib import Path
 import yaml
 
 from heist import logger
+from heist.matcher import Matcher
 
 _logger = logger.get(__name__)
 
 
 def _path(loader, node) -> Path | None:
-    """Custom constructor for !path tag that resolves a string to a Path-like object.
+    """Custom constructor for !path tag that resolves a string to a Path-like object. A relative path is
+    resolved against the folder of the settings file, so it does not depend on the working directory.
 
     Usage in YAML:
         >> path1: !path "../path/to/construct"
@@ -24,7 +26,14 @@ def _path(loader, node) -> Path | None:
     if not value:
         return None
 
-    return Path(value).resolve()
+    path: Path = Path(value)
+
+    # the loader is named after the file it reads
+    settings_file: Path = Path(getattr(loader, "name", ""))
+    if not path.is_absolute() and settings_file.is_file():
+        path = settings_file.parent.joinpath(path)
+
+    return path.resolve()
 
 
 def _env_path(loader, node) -> Path | None:
@@ -59,8 +68,24 @@ def _env_path(loader, node) -> Path | None:
     return Path(full_path)
 
 
+def _matcher(loader, node) -> Matcher:
+    """Custom constructor for !matcher tag that compiles a mapping of named wildcards into a Matcher once,
+    when the settings are loaded.
+
+    Usage in YAML:
+        >> categories: !matcher
+        >>   amazon: ["amazon", "amzn"]
+        >>   google: "google"
+
+    Returns:
+        (Matcher) The compiled matcher.
+    """
+    return Matcher(loader.construct_mapping(node, deep=True) or {})
+
+
 yaml.add_constructor("!path", _path)
 yaml.add_constructor("!env_path", _env_path)
+yaml.add_constructor("!matcher", _matcher)
 
 
 def load_settings():
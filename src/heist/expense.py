@@ -1,71 +1,307 @@
+import asyncio
+import functools
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
-from heist import finance, logger
+from heist import finance, logger, pdf, settings, utils
 from heist.finance import TransactionType
+from heist.service import ExtractionService, detect_and_parse, parse_statement
+from heist.store import TransactionStore
+from heist.transaction import Transaction
 
 _logger = logger.get(__name__)
 
 
-def get_chase_checking(folder: str | Path) -> list[TransactionType]:
-    """Parses a folder of Chase Bank statements.
+def _set_source(transactions: list[TransactionType], pdf_file: Path) -> list[TransactionType]:
+    """Records the statement file on each transaction, see `reconcile`.
+
+    Args:
+        transactions (list[Transaction]): The transactions parsed from the statement.
+        pdf_file (Path): The statement PDF file.
+
+    Returns:
+        (list[Transaction]) The same transactions.
+    """
+    source: str = pdf_file.as_posix()
+
+    for transaction in transactions:
+        if isinstance(transaction, Transaction):
+            transaction.source = source
+
+    return transactions
+
+
+def _iter_routes(routes: list[tuple[type[finance.BaseStatement] | None, Path]],
+                 workers: int | None = None,
+                 store: TransactionStore | None = None,
+                 service: ExtractionService | None = None) -> Iterator[TransactionType]:
+    """Parses each PDF file with its statement class across a pool of worker processes, yielding the
+    transactions in the order of the routes.
+
+    A route without a statement class is looked up in the store first, and is otherwise detected from
+    its first page by the worker that parses it.
 
     Args:
+        routes (list[tuple[type[BaseStatement] | None, Path]]): The statement class, or None to detect it,
+            and PDF file of each statement.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting, or every core.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with, instead of starting
+            a pool for these routes alone. Default is None.
+
+    Returns:
+        (Iterator[Transaction]) The transaction details.
+    """
+    if not routes:
+        return
+
+    executor: ProcessPoolExecutor | None = None
+
+    if service is not None:
+        workers = service.workers
+        submit, submit_detect = service.submit, service.submit_detect
+    else:
+        workers = settings.get("workers") if workers is None else workers
+        workers = max(1, min(workers or os.cpu_count() or 1, len(routes)))
+
+        if workers > 1:
+            # the workers use the same text cache as this process, rather than the one in the settings
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=pdf.set_cache, initargs=(pdf.cache_folder(),))
+            submit = functools.partial(executor.submit, parse_statement)
+            submit_detect = functools.partial(executor.submit, detect_and_parse)
+
+    # a statement found in the store has no future, it is only loaded when its turn to be yielded comes
+    window: deque[tuple[type[finance.BaseStatement] | None, Path, str | None, Future | None]] = deque()
+    loaded: int = 0
+
+    def _result(statement: type[finance.BaseStatement] | None,
+                pdf_file: Path,
+                file_hash: str | None,
+                result: Future | None) -> list[TransactionType]:
+        if result is None:
+            return _set_source(store.load(pdf_file), pdf_file)
+
+        try:
+            transactions: list[TransactionType] = result.result()
+        except Exception as e:
+            _logger.error(f"Failed to parse statement: {pdf_file} - {e}")
+            return []
+
+        if statement is None:
+            statement, transactions = transactions
+
+            if statement is None:
+                _logger.warning(f"Unknown statement, skipping: {pdf_file}")
+                return []
+
+        if store is not None:
+            store.save(pdf_file, file_hash, statement, transactions)
+
+        return _set_source(transactions, pdf_file)
+
+    try:
+        for statement, pdf_file in routes:
+            file_hash: str | None = None
+            current: bool = False
+
+            if store is not None:
+                file_hash = utils.file_hash(pdf_file)
+
+                # a statement stored with a registered class is routed without extracting any text to detect it
+                current = (store.lookup(pdf_file, file_hash, finance.registry()) is not None if statement is None
+                           else store.is_current(pdf_file, file_hash, statement))
+
+            future: Future | None = None
+
+            if current:
+                loaded += 1
+            elif service is None and executor is None:
+                future = Future()
+                try:
+                    future.set_result(parse_statement(statement, pdf_file) if statement else detect_and_parse(pdf_file))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = submit(statement, pdf_file) if statement else submit_detect(pdf_file)
+
+            window.append((statement, pdf_file, file_hash, future))
+
+            # stored statements at the front are handed back right away, then the oldest statements once the
+            # window is full, so only a few are held at a time
+            while window and (window[0][3] is None or len(window) >= workers * 2):
+                yield from _result(*window.popleft())
+
+        while window:
+            yield from _result(*window.popleft())
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    if store is not None:
+        _logger.info(f"Loaded {loaded} of {len(routes)} statements from the store.")
+
+
+def iter_statements(statement: type[finance.BaseStatement],
+                    folder: str | Path,
+                    workers: int | None = None,
+                    store: TransactionStore | None = None,
+                    service: ExtractionService | None = None) -> Iterator[TransactionType]:
+    """Parses a folder of statements across a pool of worker processes, yielding the transactions as each
+    statement is done.
+
+    The transactions are yielded in file name order, so the output is the same no matter which worker
+    finishes first. At most two statements per worker are in flight at a time, so memory stays flat no
+    matter how many statements are in the folder. A PDF that fails to parse is logged and skipped
+    without stopping the batch.
+
+    When a transaction store is passed, only new or changed PDFs are parsed, everything else is loaded
+    from the store.
+
+    Args:
+        statement (type[BaseStatement]): The statement class used to parse the PDF files.
         folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting, or every core.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
 
     Returns:
-        (list[dict]) The transaction details.
+        (Iterator[Transaction]) The transaction details.
     """
     folder = Path(folder) if isinstance(folder, str) else folder
 
     if not folder.exists():
         _logger.error(f"Folder does not exist: {folder}")
-        return []
-
-    _logger.info("Read Chase checking statements.")
+        return
 
-    all_trans: list[TransactionType] = []
+    routes: list[tuple[type[finance.BaseStatement], Path]] = [(statement, pdf_file) for pdf_file in sorted(folder.glob("*.pdf"))]
 
-    for pdf_file in folder.glob("*.pdf"):
-        pdf_finance: finance.ChaseChecking = finance.ChaseChecking(pdf_file, save_pdf=False)
-        all_trans.extend(pdf_finance.transactions)
+    yield from _iter_routes(routes, workers=workers, store=store, service=service)
 
-    return all_trans
 
+def iter_folder(folder: str | Path,
+                workers: int | None = None,
+                store: TransactionStore | None = None,
+                service: ExtractionService | None = None,
+                recursive: bool = False) -> Iterator[TransactionType]:
+    """Parses a folder of mixed statements, routing each PDF to the statement class detected from its first page.
 
-def get_chase_amazon(folder: str | Path) -> list[TransactionType]:
-    """Parses a folder of Chase Amazon Visa credit card statements.
+    Details:
+        A PDF already in the store is routed by the statement class it was stored with, without extracting
+        any text. Otherwise the worker that parses it extracts the first page to detect the issuer, see
+        `finance.detect_statement`. PDFs that match no registered statement class are logged and skipped,
+        rather than being fully extracted by the wrong parser.
 
     Args:
         folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting, or every core.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
+        recursive (bool, optional):  Whether to include the PDF files in sub-folders. Default is False.
 
     Returns:
-        (list[dict]) The transaction details.
+        (Iterator[Transaction]) The transaction details.
     """
     folder = Path(folder) if isinstance(folder, str) else folder
 
     if not folder.exists():
         _logger.error(f"Folder does not exist: {folder}")
-        return []
+        return
 
-    _logger.info("Read Chase Amazon statements.")
+    _logger.info(f"Read statements: {folder}")
 
-    all_trans: list[TransactionType] = []
+    pdf_files: list[Path] = sorted(folder.rglob("*.pdf") if recursive else folder.glob("*.pdf"))
+    routes: list[tuple[type[finance.BaseStatement] | None, Path]] = [(None, pdf_file) for pdf_file in pdf_files]
 
-    for pdf_file in folder.glob("*.pdf"):
-        pdf_finance: finance.ChaseCreditAmazon = finance.ChaseCreditAmazon(pdf_file, save_pdf=False)
-        all_trans.extend(pdf_finance.transactions)
+    yield from _iter_routes(routes, workers=workers, store=store, service=service)
 
-    return all_trans
 
+async def _read_routes_async(routes: list[tuple[type[finance.BaseStatement] | None, Path]],
+                             concurrency: int,
+                             store: TransactionStore | None) -> list[TransactionType]:
+    """Parses each PDF file with its statement class from the event loop, with at most `concurrency`
+    extraction processes running at a time.
 
-def get_barclays_arrivalplus(folder: str | Path) -> list[TransactionType]:
-    """Parses a folder of Barclay's Arrival+ Mastercard credit card statements.
+    Details:
+        Only the extraction processes are awaited on the event loop. Opening the PDF, hashing it, the
+        store and the parsing run in worker threads, the store calls one at a time on a thread of their own.
+        A route without a statement class is looked up in the store, and is otherwise detected from its
+        first page, see `iter_folder`.
+
+    Args:
+        routes (list[tuple[type[BaseStatement] | None, Path]]): The statement class, or None to detect it,
+            and PDF file of each statement.
+        concurrency (int): The maximum number of extraction processes running at a time.
+        store (TransactionStore, optional):  The store of previously parsed statements.
+
+    Returns:
+        (list[Transaction]) The transaction details, in the order of the routes.
+    """
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+    store_thread: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1)
+
+    async def _store(method: Callable, *args):
+        return await loop.run_in_executor(store_thread, method, *args)
+
+    async def _read(statement: type[finance.BaseStatement] | None, pdf_file: Path) -> list[TransactionType]:
+        file_hash: str | None = None
+
+        if store is not None:
+            file_hash = await asyncio.to_thread(utils.file_hash, pdf_file)
+            current: bool = (await _store(store.lookup, pdf_file, file_hash, finance.registry()) is not None if statement is None
+                             else await _store(store.is_current, pdf_file, file_hash, statement))
+
+            if current:
+                return _set_source(await _store(store.load, pdf_file), pdf_file)
+
+        try:
+            if statement is None:
+                statement = await finance.detect_statement_async(pdf_file, file_hash=file_hash, semaphore=semaphore)
+
+                if statement is None:
+                    _logger.warning(f"Unknown statement, skipping: {pdf_file}")
+                    return []
+
+            reader: finance.BaseStatement = await asyncio.to_thread(statement, pdf_file, save_pdf=False)
+            if file_hash is not None:
+                reader.file_hash = file_hash
+
+            transactions: list[TransactionType] = await reader.transactions_async(semaphore)
+        except Exception as e:
+            _logger.error(f"Failed to parse statement: {pdf_file} - {e}")
+            return []
+
+        if store is not None:
+            await _store(store.save, pdf_file, reader.file_hash, statement, transactions)
+
+        return _set_source(transactions, pdf_file)
+
+    try:
+        results: list[list[TransactionType]] = await asyncio.gather(*[_read(statement, pdf_file) for statement, pdf_file in routes])
+    finally:
+        store_thread.shutdown(wait=True)
+
+    return [transaction for result in results for transaction in result]
+
+
+async def read_statements_async(statement: type[finance.BaseStatement],
+                                folder: str | Path,
+                                concurrency: int = 16,
+                                store: TransactionStore | None = None) -> list[TransactionType]:
+    """Parses a folder of statements from an asyncio event loop, with the pdftotext processes awaited
+    rather than blocking a thread per statement.
 
     Args:
+        statement (type[BaseStatement]): The statement class used to parse the PDF files.
         folder (str | Path): The folder containing the PDF files.
+        concurrency (int, optional):  The maximum number of pdftotext processes running at a time. Default is 16.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
 
     Returns:
-        (list[dict]) The transaction details.
+        (list[Transaction]) The transaction details, in file name order.
     """
     folder = Path(folder) if isinstance(folder, str) else folder
 
@@ -73,12 +309,117 @@ def get_barclays_arrivalplus(folder: str | Path) -> list[TransactionType]:
         _logger.error(f"Folder does not exist: {folder}")
         return []
 
-    _logger.info("Read Barclay's Arrival+ statements.")
+    routes: list[tuple[type[finance.BaseStatement], Path]] = [(statement, pdf_file) for pdf_file in sorted(folder.glob("*.pdf"))]
+
+    return await _read_routes_async(routes, concurrency, store)
+
+
+async def read_folder_async(folder: str | Path,
+                            concurrency: int = 16,
+                            store: TransactionStore | None = None,
+                            recursive: bool = False) -> list[TransactionType]:
+    """Parses a folder of mixed statements from an asyncio event loop, routing each PDF to the statement
+    class it was stored with or detected from its first page, see `iter_folder`.
+
+    Args:
+        folder (str | Path): The folder containing the PDF files.
+        concurrency (int, optional):  The maximum number of pdftotext processes running at a time. Default is 16.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        recursive (bool, optional):  Whether to include the PDF files in sub-folders. Default is False.
+
+    Returns:
+        (list[Transaction]) The transaction details, in file name order.
+    """
+    folder = Path(folder) if isinstance(folder, str) else folder
 
-    all_trans: list[TransactionType] = []
+    if not folder.exists():
+        _logger.error(f"Folder does not exist: {folder}")
+        return []
+
+    pdf_files: list[Path] = sorted(folder.rglob("*.pdf") if recursive else folder.glob("*.pdf"))
+    routes: list[tuple[type[finance.BaseStatement] | None, Path]] = [(None, pdf_file) for pdf_file in pdf_files]
+
+    return await _read_routes_async(routes, concurrency, store)
+
+
+def read_statements(statement: type[finance.BaseStatement],
+                    folder: str | Path,
+                    workers: int | None = None,
+                    store: TransactionStore | None = None,
+                    service: ExtractionService | None = None) -> list[TransactionType]:
+    """Parses a folder of statements across a pool of worker processes.
+
+    The transactions are merged back in file name order, so the output is the same no matter which
+    worker finishes first. A PDF that fails to parse is logged and skipped without stopping the batch.
+
+    When a transaction store is passed, only new or changed PDFs are parsed, everything else is loaded
+    from the store.
+
+    Args:
+        statement (type[BaseStatement]): The statement class used to parse the PDF files.
+        folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting, or every core.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
+
+    Returns:
+        (list[dict]) The transaction details.
+    """
+    return list(iter_statements(statement, folder, workers=workers, store=store, service=service))
 
-    for pdf_file in folder.glob("*.pdf"):
-        pdf_finance: finance.BarclaysArrivalPlus = finance.BarclaysArrivalPlus(pdf_file, save_pdf=False)
-        all_trans.extend(pdf_finance.transactions)
 
-    return all_trans
+def get_chase_checking(folder: str | Path,
+                       workers: int | None = None,
+                       store: TransactionStore | None = None,
+                       service: ExtractionService | None = None) -> list[TransactionType]:
+    """Parses a folder of Chase Bank statements.
+
+    Args:
+        folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
+
+    Returns:
+        (list[dict]) The transaction details.
+    """
+    _logger.info("Read Chase checking statements.")
+    return read_statements(finance.ChaseChecking, folder, workers=workers, store=store, service=service)
+
+
+def get_chase_amazon(folder: str | Path,
+                     workers: int | None = None,
+                     store: TransactionStore | None = None,
+                     service: ExtractionService | None = None) -> list[TransactionType]:
+    """Parses a folder of Chase Amazon Visa credit card statements.
+
+    Args:
+        folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
+
+    Returns:
+        (list[dict]) The transaction details.
+    """
+    _logger.info("Read Chase Amazon statements.")
+    return read_statements(finance.ChaseCreditAmazon, folder, workers=workers, store=store, service=service)
+
+
+def get_barclays_arrivalplus(folder: str | Path,
+                             workers: int | None = None,
+                             store: TransactionStore | None = None,
+                             service: ExtractionService | None = None) -> list[TransactionType]:
+    """Parses a folder of Barclay's Arrival+ Mastercard credit card statements.
+
+    Args:
+        folder (str | Path): The folder containing the PDF files.
+        workers (int, optional):  The number of worker processes. Default is the 'workers' setting.
+        store (TransactionStore, optional):  The store of previously parsed statements. Default is None.
+        service (ExtractionService, optional):  The resident worker pool to parse with. Default is None.
+
+    Returns:
+        (list[dict]) The transaction details.
+    """
+    _logger.info("Read Barclay's Arrival+ statements.")
+    return read_statements(finance.BarclaysArrivalPlus, folder, workers=workers, store=store, service=service)
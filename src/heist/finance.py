@@ -2,14 +2,35 @@
 This was written in 2024 to parse statements from 2023. There is a possibility that older or future
 statements may not parse correctly. This is due to the fact that the PDF format may change over time.
 """
+import asyncio
+import inspect
 import re
+from collections.abc import Iterable, Iterator
+from functools import cached_property
 from pathlib import Path
 
 from heist import logger, pdf, utils
+from heist.matcher import Matcher
+from heist.transaction import Transaction
 
 _logger = logger.get(__name__)
 
-TransactionType = dict[str, str | float]
+TransactionType = Transaction
+
+# the statement classes that can be detected from the first page of a PDF, in the order they are checked
+_registry: list[type["BaseStatement"]] = []
+
+
+# a date with a year, as printed in a statement period. Example: "01/13/24", "January 13, 2024"
+_period_date: str = (
+    r"(?:\d{1,2}/\d{1,2}/(?:\d{4}|\d{2})"
+    r"|(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.? \d{1,2},? \d{4})"
+)
+_re_period_date: re.Pattern = re.compile(
+    r"(?P<month>\d{1,2})/(?P<day>\d{1,2})/(?P<year>\d{4}|\d{2})"
+    r"|(?P<month_name>[a-z]+)\.? (?P<day_name>\d{1,2}),? (?P<year_name>\d{4})",
+    flags=re.IGNORECASE,
+)
 
 
 class BaseStatement(pdf.PdfFile):
@@ -22,8 +43,21 @@ class BaseStatement(pdf.PdfFile):
     You may override the `__re_page_end__` and `__re_transaction__` attributes to match the
     page end and transaction lines in the PDF. Financial statements may not be formatted the same
     way, so you may need to override these attributes to match the PDF you are working with.
+
+    Subclasses that set `__re_fingerprint__` are registered for detection, a PDF is detected as the
+    statement when every one of the fingerprint patterns is found on its first page.
+
+    Override `__re_statement_period__` to match how the statement prints its period, the 'end' group
+    is the closing date. Transactions are dated in ISO format with the year of that period, and keep
+    their MM/DD date when the period is not found.
     """
 
+    # bump this when the parsing of a statement changes, so stored transactions are parsed again
+    __parser_version__: int = 3
+
+    # the fields of the transactions this statement produces, used for the CSV headers
+    __fields__: tuple[str, ...] = ("bank", "date", "description", "amount")
+
     # this helps us find the absolute bottom of a page
     __re_page_end__: str = r"Page \d+ of \d+"
 
@@ -34,6 +68,42 @@ class BaseStatement(pdf.PdfFile):
         r"(?P<amount>.*[\d]+\.[\d]+)\s+"
         r"(?P<balance>[\d\.,\-]+)"
     )
+    _re_transaction: re.Pattern = re.compile(__re_transaction__, flags=re.IGNORECASE)
+
+    # this finds the statement period on the first page, the 'end' group is the date that closes it
+    __re_statement_period__: str = (
+        rf"(?:statement period|opening/closing date|through)\W*(?:{_period_date}\s*(?:-|to|through)\s*)?(?P<end>{_period_date})"
+    )
+    _re_statement_period: re.Pattern = re.compile(__re_statement_period__, flags=re.IGNORECASE)
+
+    # these identify the issuer from the text of the first page, every pattern must be found
+    __re_fingerprint__: tuple[str, ...] = ()
+    _re_fingerprint: tuple[re.Pattern, ...] = ()
+
+    # whether `_parse_transaction` takes the match of the line, subclasses that only take the text are still supported
+    _parse_match: bool = True
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._parse_match = "match" in inspect.signature(cls._parse_transaction).parameters
+        cls._re_transaction = re.compile(cls.__re_transaction__, flags=re.IGNORECASE)
+        cls._re_statement_period = re.compile(cls.__re_statement_period__, flags=re.IGNORECASE)
+        cls._re_fingerprint = tuple(re.compile(p, flags=re.IGNORECASE) for p in cls.__re_fingerprint__)
+
+        if cls._re_fingerprint and "__re_fingerprint__" in cls.__dict__:
+            _registry.append(cls)
+
+    @classmethod
+    def is_fingerprint(cls, text: str) -> bool:
+        """Checks if the text of a first page matches the fingerprint of this statement.
+
+        Args:
+            text (str): The text of the first page.
+
+        Returns:
+            (bool) True if every fingerprint pattern is found in the text, otherwise False.
+        """
+        return bool(cls._re_fingerprint) and all(regex.search(text) for regex in cls._re_fingerprint)
 
     def __init__(self,
                  filename: str | Path,
@@ -51,11 +121,28 @@ class BaseStatement(pdf.PdfFile):
         """
         super().__init__(filename, start_page=start_page, end_page=end_page, page_break=page_break, save_pdf=save_pdf)
 
-    @property
+    @cached_property
     def bank_name(self) -> str:
         """Returns the name of the bank."""
         return re.sub(r"(\w)([A-Z])", r"\1 \2", self.__class__.__name__).lower().strip()
 
+    def _match_transaction(self, text: str, match: re.Match | None = None) -> re.Match | None:
+        """Matches the given string against the transaction pattern.
+
+        Args:
+            text (str): The string to match.
+            match (re.Match, optional):  The match of the string when it was already matched, it is returned
+                as is. Default is None.
+
+        Returns:
+            (re.Match | None) The match if the string is a transaction line, otherwise None.
+        """
+        if match is not None:
+            return match
+
+        text = text.strip().replace("\r", "").replace("\n", "")
+        return self._re_transaction.match(text)
+
     def _is_transaction(self, text: str) -> bool:
         """Checks if the given string is a transaction line.
 
@@ -65,29 +152,32 @@ class BaseStatement(pdf.PdfFile):
         Returns:
             (bool) True if the string is a transaction line, otherwise False.
         """
-        text = text.strip().replace("\r", "").replace("\n", "")
-        return bool(re.match(self.__re_transaction__, text))
+        return self._match_transaction(text) is not None
 
-    def _get_transaction_details(self, text: str, absolute: bool = True) -> tuple:
+    def _get_transaction_details(self, text: str, absolute: bool = True, match: re.Match | None = None) -> tuple:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
             absolute (bool, optional):  Whether to return the absolute value of the amount. Default is True.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
             (tuple) The transaction details; date, desc, amount, balance.
         """
         raise NotImplementedError
 
-    def _parse_transaction(self, text: str) -> TransactionType:
+    def _parse_transaction(self, text: str, match: re.Match | None = None) -> TransactionType:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
-            (dict) The transaction details.
+            (Transaction) The transaction details.
         """
         raise NotImplementedError
 
@@ -106,28 +196,129 @@ class BaseStatement(pdf.PdfFile):
 
         transactions = self.transactions if transactions is None else transactions
 
-        return [item for item in transactions if re.search(regex, item["description"])]
+        return [item for item in transactions if regex.search(item["description"])]
 
-    @property
+    def invalidate(self) -> None:
+        """Clears the cached page text and transactions, so they are parsed again on the next access."""
+        super().invalidate()
+        self.__dict__.pop("transactions", None)
+
+    async def transactions_async(self, semaphore: asyncio.Semaphore | None = None) -> list[TransactionType]:
+        """Extracts the pages without blocking the event loop, then parses and caches the transactions the
+        same as `transactions`, in a worker thread.
+
+        Args:
+            semaphore (asyncio.Semaphore, optional):  Held around each extraction process, to cap the number
+                running across every statement being read. Default is None.
+
+        Returns:
+            (list[Transaction]) The transaction details.
+        """
+        await self.load_async(semaphore)
+        return await asyncio.to_thread(lambda: self.transactions)
+
+    @cached_property
     def transactions(self) -> list[TransactionType]:
         """Parses a bank statement PDF file and prints the transaction details.
 
+        Details:
+            The transactions are parsed on first access and kept for the lifetime of the instance, call
+            `invalidate()` to parse them again.
+
         Returns:
             (list[dict]) The transaction details.
         """
-        output: list[TransactionType] = []
+        return list(self.iter_transactions())
+
+    def iter_transactions(self) -> Iterator[TransactionType]:
+        """Parses a bank statement PDF file, yielding the transactions as the text is extracted.
+
+        Details:
+            When the pages are already cached they are parsed from memory, otherwise the pages are
+            streamed from the extraction without holding the whole text.
+
+        Returns:
+            (Iterator[Transaction]) The transaction details.
+        """
+        pages: Iterable[tuple[str, list[str]]] = self.__dict__["pages"].items() if "pages" in self.__dict__ else self.iter_pages()
+        period_end: int | None = None
+
+        for page_num, lines in pages:
+            # the statement period on the first page dates the transactions in its year, without it they stay MM/DD
+            if period_end is None:
+                period_end = self._period_end(lines) or 0
 
-        for page_num, lines in self.pages.items():
             for line in lines:
-                if not self._is_transaction(line):
+                # the match is handed straight to the parser, so each line is only matched once
+                match: re.Match | None = self._match_transaction(line)
+                if match is None:
                     continue
-                output.append(self._parse_transaction(line))
+                transaction: TransactionType = (self._parse_transaction(line, match=match) if self._parse_match
+                                                else self._parse_transaction(line))
+
+                if period_end:
+                    transaction["date"] = self._statement_date(transaction["date"], period_end)
+
+                yield transaction
+
+    def _period_end(self, lines: list[str]) -> int | None:
+        """Finds the end of the statement period on the first page, see `__re_statement_period__`.
+
+        Args:
+            lines (list[str]): The lines of text of the first page.
+
+        Returns:
+            (int | None) The date as YYYYMMDD, or None when the page has no statement period.
+        """
+        for line in lines:
+            match: re.Match | None = self._re_statement_period.search(line)
+            if match is None:
+                continue
+
+            date: re.Match = _re_period_date.fullmatch(match.group("end"))
+
+            try:
+                if date.group("year"):
+                    return utils.date_to_int(f"{date.group('month')}/{date.group('day')}/{date.group('year')}")
+
+                return utils.date_to_int(utils.convert_date(f"{date.group('month_name')} {date.group('day_name')}",
+                                                            year=int(date.group("year_name"))))
+            except ValueError:
+                continue
+
+        return None
+
+    @staticmethod
+    def _statement_date(date_str: str, period_end: int) -> str:
+        """Dates a transaction in the year of its statement period.
 
-        return output
+        Details:
+            A month later than the month the period ends in is from the year before, so a period from
+            December to January dates its December transactions in the earlier year.
+
+        Args:
+            date_str (str): The date of the transaction. Example: "01/31".
+            period_end (int): The end of the statement period as YYYYMMDD.
+
+        Returns:
+            (str) The ISO date, or the date as it was when it already has a year. Example: "2024-01-31".
+        """
+        if "-" in date_str or date_str.count("/") > 1:
+            return date_str
+
+        year, month_day = divmod(period_end, 10000)
+        month: int = int(date_str.split("/")[0])
+
+        return utils.iso_date(date_str, year - 1 if month > month_day // 100 else year)
 
 
 class ChaseChecking(BaseStatement):
 
+    __re_fingerprint__: tuple[str, ...] = (r"chase", r"checking (summary|account)")
+
+    # Ex. 'January 1, 2024 through January 31, 2024'
+    __re_statement_period__: str = rf"{_period_date}\s+through\s+(?P<end>{_period_date})"
+
     __re_page_end__: str = r"Page \d+ of \d+"
 
     __re_transaction__: str = (
@@ -153,17 +344,19 @@ class ChaseChecking(BaseStatement):
         """
         super().__init__(filename, start_page=start_page, end_page=end_page, page_break=page_break, save_pdf=save_pdf)
 
-    def _get_transaction_details(self, text: str, absolute: bool = True) -> tuple:
+    def _get_transaction_details(self, text: str, absolute: bool = True, match: re.Match | None = None) -> tuple:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
             absolute (bool, optional):  Whether to return the absolute value of the amount. Default is True.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
             (tuple) The transaction details; date, desc, amount, balance.
         """
-        match: re.Match = re.match(self.__re_transaction__, text, flags=re.IGNORECASE)
+        match = self._match_transaction(text, match)
 
         date: str = match.group("date")
         desc: str = " ".join(list(filter(None, match.group("desc").split(" "))))
@@ -172,21 +365,28 @@ class ChaseChecking(BaseStatement):
 
         return date, desc, amount, balance
 
-    def _parse_transaction(self, text: str) -> TransactionType:
+    def _parse_transaction(self, text: str, match: re.Match | None = None) -> TransactionType:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
-            (dict) The transaction details.
+            (Transaction) The transaction details.
         """
-        date, desc, amount, balance = self._get_transaction_details(text)
-        return dict(zip(["bank", "date", "description", "amount"], [self.bank_name, date, desc, amount]))
+        date, desc, amount, balance = self._get_transaction_details(text, match=match)
+        return Transaction(self.bank_name, date, desc, amount)
 
 
 class ChaseCreditAmazon(BaseStatement):
 
+    __re_fingerprint__: tuple[str, ...] = (r"chase", r"amazon")
+
+    # Ex. 'Opening/Closing Date 12/14/23 - 01/13/24'
+    __re_statement_period__: str = rf"opening/closing date\s+{_period_date}\s*-\s*(?P<end>{_period_date})"
+
     __re_page_end__ = (
         r"(?P<date>\d+/\d+/\d+)\s+"
         r"(?P<page>Page \d+ of \d+)"
@@ -213,29 +413,33 @@ class ChaseCreditAmazon(BaseStatement):
         """
         super().__init__(filename, start_page=start_page, end_page=end_page, page_break=page_break, save_pdf=save_pdf)
 
-    def _parse_transaction(self, text: str) -> TransactionType:
+    def _parse_transaction(self, text: str, match: re.Match | None = None) -> TransactionType:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
-            (dict) The transaction details.
+            (Transaction) The transaction details.
         """
-        date, desc, amount = self._get_transaction_details(text)
-        return dict(zip(["bank", "date", "description", "amount"], [self.bank_name, date, desc, amount]))
+        date, desc, amount = self._get_transaction_details(text, match=match)
+        return Transaction(self.bank_name, date, desc, amount)
 
-    def _get_transaction_details(self, text: str, absolute: bool = True) -> tuple:
+    def _get_transaction_details(self, text: str, absolute: bool = True, match: re.Match | None = None) -> tuple:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
             absolute (bool, optional):  Whether to return the absolute value of the amount. Default is True.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
             (tuple) The transaction details; date, desc, amount, balance.
         """
-        match: re.Match = re.match(self.__re_transaction__, text, flags=re.IGNORECASE)
+        match = self._match_transaction(text, match)
 
         date: str = match.group("date")
         desc: str = " ".join(list(filter(None, match.group("desc").split(" "))))
@@ -245,6 +449,13 @@ class ChaseCreditAmazon(BaseStatement):
 
 
 class BarclaysArrivalPlus(BaseStatement):
+    __re_fingerprint__: tuple[str, ...] = (r"barclay", r"arrival")
+
+    # Ex. 'Statement Period 12/14/23 - 01/13/24'
+    __re_statement_period__: str = rf"statement period\W*{_period_date}\s*(?:-|to)\s*(?P<end>{_period_date})"
+
+    __fields__: tuple[str, ...] = ("bank", "date", "description", "miles", "amount")
+
     __re_page_end__: str = r"Page \d+ of \d+"
 
     __re_transaction__: str = (
@@ -271,29 +482,33 @@ class BarclaysArrivalPlus(BaseStatement):
         """
         super().__init__(filename, start_page=start_page, end_page=end_page, page_break=page_break, save_pdf=save_pdf)
 
-    def _parse_transaction(self, text: str) -> TransactionType:
+    def _parse_transaction(self, text: str, match: re.Match | None = None) -> TransactionType:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
-            (dict) The transaction details.
+            (Transaction) The transaction details.
         """
-        date, desc, miles, amount = self._get_transaction_details(text)
-        return dict(zip(["bank", "date", "description", "miles", "amount"], [self.bank_name, date, desc, miles, amount]))
+        date, desc, miles, amount = self._get_transaction_details(text, match=match)
+        return Transaction(self.bank_name, date, desc, amount, miles=miles)
 
-    def _get_transaction_details(self, text: str, absolute: bool = True) -> tuple:
+    def _get_transaction_details(self, text: str, absolute: bool = True, match: re.Match | None = None) -> tuple:
         """Parses a transaction line and returns the details.
 
         Args:
             text (str): The transaction line to parse.
             absolute (bool, optional):  Whether to return the absolute value of the amount. Default is True.
+            match (re.Match, optional):  The transaction pattern match of the line, when it was already matched.
+                Default is None.
 
         Returns:
             (tuple) The transaction details; date, desc, amount, balance.
         """
-        match: re.Match = re.match(self.__re_transaction__, text, flags=re.IGNORECASE)
+        match = self._match_transaction(text, match)
 
         date: str = utils.convert_date(match.group("dateA"))
         desc: str = " ".join(list(filter(None, match.group("desc").split(" "))))
@@ -303,19 +518,108 @@ class BarclaysArrivalPlus(BaseStatement):
         return date, desc, miles, amount
 
 
-def search_transactions(wildcards: str | list[str], transactions: list[dict]) -> list[dict]:
+def registry() -> list[type[BaseStatement]]:
+    """Gets the statement classes that can be detected, in the order they are checked.
+
+    Returns:
+        (list[type[BaseStatement]]) The registered statement classes.
+    """
+    return list(_registry)
+
+
+def detect_statement(filename: str | Path) -> type[BaseStatement] | None:
+    """Detects the statement class of a PDF file by extracting only its first page.
+
+    Args:
+        filename (str | Path): The path to the PDF file.
+
+    Returns:
+        (type[BaseStatement] | None) The first registered statement class whose fingerprint matches, otherwise None.
+    """
+    return _match_fingerprint("\n".join(pdf.PdfFile(filename, start_page=1, end_page=1).iter_lines()))
+
+
+async def detect_statement_async(filename: str | Path,
+                                 file_hash: str | None = None,
+                                 semaphore: asyncio.Semaphore | None = None) -> type[BaseStatement] | None:
+    """Detects the statement class of a PDF file by extracting only its first page, without blocking the event loop.
+
+    Args:
+        filename (str | Path): The path to the PDF file.
+        file_hash (str, optional):  The hash of the PDF file, when it is already known. Default is None.
+        semaphore (asyncio.Semaphore, optional):  Held around the extraction process. Default is None.
+
+    Returns:
+        (type[BaseStatement] | None) The first registered statement class whose fingerprint matches, otherwise None.
+    """
+    first_page: pdf.PdfFile = await asyncio.to_thread(pdf.PdfFile, filename, start_page=1, end_page=1)
+
+    if file_hash is not None:
+        first_page.file_hash = file_hash
+
+    return _match_fingerprint("\n".join(await first_page.lines_async(semaphore)))
+
+
+def _match_fingerprint(first_page: str) -> type[BaseStatement] | None:
+    for statement in _registry:
+        if statement.is_fingerprint(first_page):
+            return statement
+
+    return None
+
+
+def statement_fields(statements: list[type[BaseStatement]] | None = None) -> list[str]:
+    """Gets the transaction fields produced by the statement classes, without scanning any transactions.
+
+    Args:
+        statements (list[type[BaseStatement]], optional):  The statement classes. Default is every subclass of BaseStatement.
+
+    Returns:
+        (list[str]) The fields, in the order they are first declared.
+    """
+    if statements is None:
+        statements, pending = [], [BaseStatement]
+        while pending:
+            subclasses: list[type[BaseStatement]] = pending.pop(0).__subclasses__()
+            statements.extend(subclasses)
+            pending.extend(subclasses)
+
+    fields: dict[str, None] = {}
+    for statement in statements:
+        fields.update(dict.fromkeys(statement.__fields__))
+
+    return list(fields)
+
+
+def search_transactions(wildcards: str | list[str], transactions: list[TransactionType]) -> list[TransactionType]:
     """Finds expenses that match the given wildcard.
 
     Args:
         wildcards (str | list[str]): The wildcard or wildcards to search for.
-        transactions (list[dict]): The transactions to search.
+        transactions (list[Transaction]): The transactions to search.
 
     Returns:
-        (list[dict]) The transactions that match the wildcard.
+        (list[Transaction]) The transactions that match the wildcard.
     """
     _logger.info(f"Search transactions for: {wildcards}")
 
     wildcards = "|".join(wildcards) if isinstance(wildcards, list) else wildcards
     regex = re.compile(wildcards, flags=re.IGNORECASE)
 
-    return [item for item in transactions if re.search(regex, item["description"])]
+    return [item for item in transactions if regex.search(item["description"])]
+
+
+def search_transactions_batch(queries: dict[str, str | list[str]],
+                              transactions: list[TransactionType]) -> dict[str, list[TransactionType]]:
+    """Finds expenses that match each of the named wildcard queries, in a single pass over the transactions.
+
+    Args:
+        queries (dict[str, str | list[str]]): The wildcard or wildcards of each named query.
+        transactions (list[Transaction]): The transactions to search.
+
+    Returns:
+        (dict[str, list[Transaction]]) The transactions that match each query.
+    """
+    _logger.info(f"Search transactions for: {list(queries)}")
+
+    return Matcher(queries).classify(transactions)
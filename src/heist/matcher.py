@@ -0,0 +1,148 @@
+"""Heist: Transaction Matcher
+Classifies transactions against many named wildcard queries in a single pass. The queries are joined
+into one combined pattern, which rejects most descriptions with a single search, and the buckets of
+each distinct description are remembered, since the same descriptions repeat month over month.
+"""
+import re
+from collections.abc import Iterable, Iterator
+
+from heist import logger
+
+_logger = logger.get(__name__)
+
+
+def _join(wildcards: str | list[str]) -> str:
+    return "|".join(wildcards) if isinstance(wildcards, list) else wildcards
+
+
+class Matcher:
+    """Matches transaction descriptions against a set of named wildcard queries.
+
+    Each query is a wildcard or a list of wildcards, the same as `finance.search_transactions`, and
+    matches case-insensitively anywhere in the description.
+    """
+
+    def __init__(self, queries: dict[str, str | list[str]]) -> None:
+        """Matches transaction descriptions against a set of named wildcard queries.
+
+        Args:
+            queries (dict[str, str | list[str]]): The wildcard or wildcards of each named query.
+        """
+        self._names: tuple[str, ...] = tuple(queries)
+        self._patterns: tuple[re.Pattern, ...] = tuple(re.compile(_join(w), flags=re.IGNORECASE) for w in queries.values())
+
+        # a description that misses the combined pattern cannot match any of the queries
+        self._combined: re.Pattern | None = self._combine(self._patterns)
+
+        self._memo: dict[str, tuple[str, ...]] = {}
+        self._first: dict[str, str | None] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(queries={list(self._names)})"
+
+    @staticmethod
+    def _combine(patterns: tuple[re.Pattern, ...]) -> re.Pattern | None:
+        """Joins the patterns into one pattern that matches when any of them does.
+
+        Details:
+            Joining changes the meaning of some patterns, group numbers shift under backreferences,
+            group names can clash and inline flags must come first. Patterns with groups or that fail
+            to join are not combined, and every query is searched on its own instead.
+
+        Args:
+            patterns (tuple[re.Pattern, ...]): The compiled query patterns.
+
+        Returns:
+            (re.Pattern | None) The combined pattern, or None when the patterns cannot be joined safely.
+        """
+        if any(pattern.groups for pattern in patterns):
+            return None
+
+        try:
+            return re.compile("|".join(f"(?:{p.pattern})" for p in patterns) or r"(?!)", flags=re.IGNORECASE)
+        except re.error:
+            return None
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """Returns the names of the queries, in the order they were declared."""
+        return self._names
+
+    def match(self, description: str) -> tuple[str, ...]:
+        """Gets the names of every query that matches the description.
+
+        Args:
+            description (str): The transaction description.
+
+        Returns:
+            (tuple[str, ...]) The names of the matching queries, in the order they were declared.
+        """
+        names: tuple[str, ...] | None = self._memo.get(description)
+
+        if names is None:
+            if self._combined is not None and self._combined.search(description) is None:
+                names = ()
+            else:
+                names = tuple(name for name, regex in zip(self._names, self._patterns) if regex.search(description))
+
+            self._memo[description] = names
+
+        return names
+
+    def first(self, description: str) -> str | None:
+        """Gets the name of the first declared query that matches the description.
+
+        Details:
+            The queries are tried in the order they were declared and stop at the first match, so with
+            many queries a description only pays for the queries ahead of its own.
+
+        Args:
+            description (str): The transaction description.
+
+        Returns:
+            (str | None) The name of the first matching query, otherwise None.
+        """
+        if description in self._first:
+            return self._first[description]
+
+        name: str | None = None
+
+        if self._combined is None or self._combined.search(description) is not None:
+            name = next((name for name, regex in zip(self._names, self._patterns) if regex.search(description)), None)
+
+        self._first[description] = name
+
+        return name
+
+    def categorize(self, transactions: Iterable[dict], field: str = "category", default: str | None = None) -> Iterator[dict]:
+        """Sets the category of each transaction as it is streamed, the name of the first query its description matches.
+
+        Args:
+            transactions (Iterable[dict]): The transactions to categorize.
+            field (str, optional):  The field the category is set on. Default is 'category'.
+            default (str, optional):  The category of transactions that match no query. Default is None.
+
+        Returns:
+            (Iterator[dict]) The same transactions with their category set.
+        """
+        for transaction in transactions:
+            name: str | None = self.first(transaction["description"])
+            transaction[field] = default if name is None else name
+            yield transaction
+
+    def classify(self, transactions: Iterable[dict]) -> dict[str, list[dict]]:
+        """Sorts the transactions into the bucket of every query they match.
+
+        Args:
+            transactions (Iterable[dict]): The transactions to classify.
+
+        Returns:
+            (dict[str, list[dict]]) The matching transactions of each query.
+        """
+        buckets: dict[str, list[dict]] = {name: [] for name in self._names}
+
+        for transaction in transactions:
+            for name in self.match(transaction["description"]):
+                buckets[name].append(transaction)
+
+        return buckets
@@ -0,0 +1,183 @@
+"""Heist: Merchant Names
+The same merchant shows up under many descriptions, "AMZN Mktp US*2K4", "AMAZON.COM*XY1" and so on.
+The descriptions are reduced to a canonical merchant name, and every raw description is remembered in
+a table kept on disk, so each distinct description is only normalized once across runs.
+"""
+import hashlib
+import json
+import os
+import re
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from heist import logger
+from heist.finance import TransactionType
+
+_logger = logger.get(__name__)
+
+# payment processors that put their own name in front of the merchant, Ex. 'SQ *BLUE BOTTLE'
+_processors: frozenset[str] = frozenset({"SQ", "SQU", "TST", "PAYPAL", "PP", "SP", "IN", "DD", "WPY", "PY"})
+
+# the first word of a cleaned up description, mapped to the canonical merchant
+_aliases: dict[str, str] = {
+    "AMZN": "Amazon",
+    "AMAZON": "Amazon",
+    "AMAZONCOM": "Amazon",
+    "PRIME": "Amazon",
+    "APPLECOM": "Apple",
+    "APPLE": "Apple",
+    "GOOGLE": "Google",
+    "NETFLIX": "Netflix",
+    "NETFLIXCOM": "Netflix",
+    "SPOTIFY": "Spotify",
+    "HULU": "Hulu",
+    "OPENAI": "OpenAI",
+    "CHATGPT": "OpenAI",
+    "UBER": "Uber",
+    "LYFT": "Lyft",
+}
+
+# reference numbers, store numbers and phone numbers that follow the merchant name
+_re_reference: re.Pattern = re.compile(r"#\s*\w+|\b\w*\d{3,}\w*\b|\b\d+\b")
+_re_punctuation: re.Pattern = re.compile(r"[^\w\s&]+|_")
+_re_domain: re.Pattern = re.compile(r"\.(com|net|org|co)\b", flags=re.IGNORECASE)
+
+
+def canonical_merchant(description: str, aliases: dict[str, str] | None = None) -> str:
+    """Reduces a transaction description to a canonical merchant name.
+
+    Details:
+        A payment processor prefix like 'SQ *' is dropped, then everything after the first '*', which
+        is a reference code. Store and reference numbers are removed and what is left is title cased,
+        unless its first word is a known alias.
+
+    Args:
+        description (str): The transaction description.
+        aliases (dict[str, str], optional):  The first word of a description mapped to its merchant. Default
+            is the built in aliases.
+
+    Returns:
+        (str) The merchant name. Example: "AMZN Mktp US*2K4" returns "Amazon".
+    """
+    aliases = _aliases if aliases is None else aliases
+    text: str = description.strip().upper()
+
+    prefix, star, rest = text.partition("*")
+    if star and prefix.strip() in _processors:
+        text = rest
+    else:
+        text = prefix
+
+    # a domain is kept as one word, so 'AMAZON.COM' is looked up as 'AMAZONCOM'
+    words: list[str] = _re_punctuation.sub(" ", _re_reference.sub(" ", _re_domain.sub(r"\1", text))).split()
+
+    if not words:
+        return description.strip()
+
+    merchant: str | None = aliases.get(words[0])
+    if merchant is not None:
+        return merchant
+
+    return " ".join(words).title()
+
+
+class MerchantTable:
+    """A table of raw transaction descriptions and their canonical merchant, kept on disk between runs.
+
+    Examples:
+        >> with MerchantTable("merchants.json") as merchants:
+        >>     transactions = list(merchants.apply(transactions))
+    """
+
+    # bump when `canonical_merchant` changes, so the merchants remembered by an older version are normalized again
+    __version__: int = 1
+
+    def __init__(self, filename: str | Path | None = None, aliases: dict[str, str] | None = None) -> None:
+        """A table of raw transaction descriptions and their canonical merchant, kept on disk between runs.
+
+        Args:
+            filename (str | Path, optional):  The JSON file the table is kept in. Default is None, which
+                keeps the table in memory only.
+            aliases (dict[str, str], optional):  The first word of a description mapped to its merchant. Default
+                is the built in aliases.
+        """
+        self._filename: Path | None = Path(filename) if filename else None
+        self._aliases: dict[str, str] | None = aliases
+        self._table: dict[str, str] = {}
+        self._added: int = 0
+
+        if self._filename is not None and self._filename.exists():
+            try:
+                data: dict = json.loads(self._filename.read_text(encoding="utf8"))
+            except (OSError, ValueError) as e:
+                _logger.warning(f"Failed to read merchant table, starting a new one: {self._filename} - {e}")
+            else:
+                # a table from another version or other aliases would keep returning the old merchant names
+                if (isinstance(data, dict) and data.get("version") == self.__version__
+                        and data.get("aliases") == self._aliases_hash()):
+                    self._table = data.get("table", {})
+                else:
+                    _logger.info(f"Merchant table is out of date, starting a new one: {self._filename}")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(filename={self._filename}, size={len(self._table)})"
+
+    def __enter__(self) -> "MerchantTable":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.save()
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _aliases_hash(self) -> str:
+        """Returns a hash of the aliases the table is normalized with."""
+        aliases: dict[str, str] = _aliases if self._aliases is None else self._aliases
+        return hashlib.sha256(json.dumps(aliases, sort_keys=True).encode("utf8")).hexdigest()
+
+    def get(self, description: str) -> str:
+        """Gets the canonical merchant of a description, normalizing it only if it has not been seen before.
+
+        Args:
+            description (str): The transaction description.
+
+        Returns:
+            (str) The merchant name.
+        """
+        merchant: str | None = self._table.get(description)
+
+        if merchant is None:
+            merchant = self._table[description] = canonical_merchant(description, aliases=self._aliases)
+            self._added += 1
+
+        return merchant
+
+    def apply(self, transactions: Iterable[TransactionType]) -> Iterator[TransactionType]:
+        """Sets the merchant of each transaction as it is streamed.
+
+        Args:
+            transactions (Iterable[Transaction]): The transactions.
+
+        Returns:
+            (Iterator[Transaction]) The same transactions with their merchant set.
+        """
+        for transaction in transactions:
+            transaction["merchant"] = self.get(transaction["description"])
+            yield transaction
+
+    def save(self) -> None:
+        """Writes the table to disk, if any descriptions were added since it was read."""
+        if self._filename is None or not self._added:
+            return
+
+        self._filename.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temp file first, so an interrupted run never leaves a partial table behind
+        temp: Path = self._filename.with_suffix(f".{os.getpid()}.tmp")
+        data: dict = {"version": self.__version__, "aliases": self._aliases_hash(), "table": self._table}
+        temp.write_text(json.dumps(data, indent=0, sort_keys=True), encoding="utf8")
+        os.replace(temp, self._filename)
+
+        _logger.info(f"Saved {self._added} new merchants: {self._filename}")
+        self._added = 0
@@ -1,13 +1,82 @@
+import asyncio
+import contextlib
+import os
 import re
 import subprocess
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property
 from io import open
 from pathlib import Path
 
 import pypdf
 
-from heist import settings, utils
+from heist import backend, cache, logger, settings, utils
 
-_pdf_to_text: Path = settings['pdftotext']
+_logger = logger.get(__name__)
+
+_text_cache: cache.TextCache | None = None
+
+
+def set_cache(folder: str | Path | None, max_size: int | None = None) -> None:
+    """Sets the folder the extracted text is cached in, for this process.
+
+    Args:
+        folder (str | Path, optional):  The cache folder, None disables the cache.
+        max_size (int, optional):  The maximum size of the cache in megabytes. Default is the 'cache_size' setting.
+    """
+    global _text_cache
+
+    max_size = int(max_size or settings.get("cache_size") or 256)
+    _text_cache = cache.TextCache(folder, max_size=max_size * 1024 * 1024) if folder else None
+
+
+def cache_folder() -> Path | None:
+    """Gets the folder the extracted text is cached in, for this process.
+
+    Returns:
+        (Path | None) The cache folder, or None when the cache is disabled.
+    """
+    return _text_cache.folder if _text_cache is not None else None
+
+
+set_cache(settings.get("cache"))
+
+
+def _cache_put(key: str, text: str) -> None:
+    """Stores the extracted text in the text cache, a full disk or read-only cache folder only loses the cache entry.
+
+    Args:
+        key (str): The cache key.
+        text (str): The extracted text.
+    """
+    try:
+        _text_cache.put(key, text)
+    except OSError as e:
+        _logger.warning(f"Failed to write text cache entry: {_text_cache.folder} - {e}")
+
+
+def count_pages(filename: str | Path) -> int:
+    """Counts the pages in a PDF file.
+
+    Details:
+        The count is read from the '/Count' entry of the root page tree, rather than walking and
+        loading every page object the way `PdfReader.get_num_pages()` does. The reader is released
+        as soon as the count is read.
+
+    Args:
+        filename (str | Path): The path to the PDF file.
+
+    Returns:
+        (int) The number of pages in the PDF.
+    """
+    reader: pypdf.PdfReader = pypdf.PdfReader(filename)
+
+    try:
+        return int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except (KeyError, TypeError, ValueError):
+        # malformed or encrypted page trees fall back to walking the pages
+        return reader.get_num_pages()
 
 
 class PdfFile:
@@ -16,10 +85,26 @@ class PdfFile:
     We use the pdftotext executable from poppler to extract the text from the PDF. This allows us to
     inspect the text and extract the information we need. The text is then stored in a dictionary
     object, where the keys are the page numbers and the values are the text from the page.
+
+    You may override the `__backend__` attribute to extract the text with a different backend, for
+    example 'pypdf' on hosts without poppler.
     """
 
+    # the text extraction backend, None uses the 'backend' setting
+    __backend__: str | None = None
+
     # this helps us find the absolute bottom of a page
     __re_page_end__: str = r"Page \d+ of \d+"
+    _re_page_end: re.Pattern = re.compile(__re_page_end__, flags=re.IGNORECASE)
+
+    # whether the text is extracted with the '-layout' option, which keeps the columns of a statement aligned
+    _layout: bool = True
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # the patterns are compiled once per class, rather than on every line of every statement
+        cls._re_page_end = re.compile(cls.__re_page_end__, flags=re.IGNORECASE)
 
     def __init__(self,
                  filename: str | Path,
@@ -35,13 +120,19 @@ class PdfFile:
             page_break (bool): Optional. Whether to remove page breaks in the text. Default is True.
             save_pdf (bool): Optional. Whether to save the text file after reading. Default is False.
         """
-        if not _pdf_to_text.is_file():
+        self._backend: backend.Backend = backend.get(self.__backend__)
+
+        if not self._backend.available():
             raise FileNotFoundError("'pdftotext.exe' could not be found. check out the './vendored/poppler/README.md' file for more info.")
 
         self._start: int
         self._end: int
         self._breaks: bool
         self._save_pdf: bool
+        self._in_memory: bool
+        self._chunk_pages: int | None
+        self._page_count: int | None = None
+        self._file_hash: str | None = None
 
         self._filename: Path = Path(filename)
 
@@ -51,8 +142,7 @@ class PdfFile:
         if not self._filename.is_file():
             raise FileNotFoundError(f"file not found: {self._filename}")
 
-        print(f"loading pdf: {self._filename}")
-        self._pdf: pypdf.PdfReader = pypdf.PdfReader(self._filename)
+        _logger.debug(f"Loading PDF: {self._filename}")
 
         end_page = self.page_count if end_page is None else end_page
 
@@ -63,6 +153,8 @@ class PdfFile:
         self._end: int = end_page
         self._breaks: bool = page_break
         self._save_pdf: bool = save_pdf
+        self._in_memory: bool = bool(settings.get("in_memory"))
+        self._chunk_pages: int | None = settings.get("chunk_pages")
 
     def __repr__(self) -> str:
         info: dict = {
@@ -89,112 +181,325 @@ class PdfFile:
         """
         return self.pdf_file.with_suffix(".txt")
 
-    # noinspection PyProtectedMember
     @property
     def page_count(self) -> int:
-        """The number of pages in the PDF.
+        """The number of pages in the PDF, this is only read from the file on first access.
 
         Returns:
             (int) The number of pages in the PDF.
         """
-        return self._pdf.get_num_pages()
+        if self._page_count is None:
+            self._page_count = count_pages(self._filename)
+
+        return self._page_count
 
     @property
+    def file_hash(self) -> str:
+        """The hash of the PDF file, this is only read from the file on first access.
+
+        Returns:
+            (str) The SHA-256 hex digest of the PDF file.
+        """
+        if self._file_hash is None:
+            self._file_hash = utils.file_hash(self._filename)
+
+        return self._file_hash
+
+    @file_hash.setter
+    def file_hash(self, value: str) -> None:
+        """Sets the hash of the PDF file when the caller already read it, so the file is not hashed twice."""
+        self._file_hash = value
+
+    @cached_property
     def pages(self) -> dict[str, list[str]]:
         """Gets the text from the PDF as a dictionary.
 
+        Details:
+            The text is extracted on first access and kept for the lifetime of the instance, call
+            `invalidate()` to extract it again.
+
         Returns:
             (dict[str, list[str]]) The text from the PDF.
         """
-        return self. _text_to_dict()
+        return self._text_to_dict()
 
-    def _is_page_end(self, text: str) -> bool:
-        return bool(re.search(self.__re_page_end__, text, flags=re.IGNORECASE))
+    def invalidate(self) -> None:
+        """Clears the cached page text, so it is extracted again on the next access."""
+        self.__dict__.pop("pages", None)
 
-    def dump_text_file(self) -> Path:
-        """Dump the data from the PDF to a text file.
+    def _is_page_end(self, text: str) -> bool:
+        return bool(self._re_page_end.search(text))
 
-        Returns:
-            (Path) The path to the text file.
-        """
+    def _validate_range(self) -> None:
         if not self.pdf_file.exists():
             raise FileNotFoundError(f"file not found: {self.pdf_file}")
 
         if self._start > self._end:
             raise ValueError(f"the pdf only has {self.page_count} pages. - start_page={self._start}")
 
-        self.text_file.unlink(missing_ok=True)
+    def dump_text_file(self) -> Path:
+        """Dump the data from the PDF to a text file.
 
-        command: list[str] = [
-            _pdf_to_text.as_posix(),
-            "-f", str(self._start),
-            "-l", str(self._end),
-            "-layout",
-            "-enc", "UTF-8",
-            "-eol", "dos"
-        ]
+        Returns:
+            (Path) The path to the text file.
+        """
+        self._validate_range()
 
-        if self._breaks:
-            command.append("-nopgbrk")
+        self.text_file.unlink(missing_ok=True)
 
-        command.extend([self.pdf_file.as_posix(), self.text_file.as_posix()])
+        if isinstance(self._backend, backend.PopplerBackend) and len(self._page_ranges()) == 1:
+            command: list[str] = self._backend.command(self.pdf_file, self.text_file.as_posix(), self._start, self._end,
+                                                       layout=self._layout, page_break=self._breaks)
 
-        print(command)
-        subprocess.run(command)
+            _logger.debug(f"Run: {command}")
+            subprocess.run(command)
+        else:
+            with open(self.text_file, "w", encoding="utf8") as f:
+                f.writelines(self._extract())
 
         if self._save_pdf:
-            print(f"text file: {self.text_file}")
+            _logger.debug(f"Text file: {self.text_file}")
 
         return self.text_file
 
-    def _text_to_list(self) -> list[str]:
-        """Converts the PDF text to a list of strings.
+    def _page_ranges(self) -> list[tuple[int, int]]:
+        """Splits the page range into chunks of the 'chunk_pages' setting.
+
+        Returns:
+            (list[tuple[int, int]]) The first and last page of each chunk.
+        """
+        if not self._chunk_pages or self._end - self._start + 1 <= self._chunk_pages:
+            return [(self._start, self._end)]
+
+        return [(start, min(start + self._chunk_pages - 1, self._end)) for start in range(self._start, self._end + 1, self._chunk_pages)]
+
+    def _extract_range(self, start_page: int, end_page: int) -> list[str]:
+        return list(self._backend.extract(self.pdf_file, start_page, end_page, layout=self._layout, page_break=self._breaks))
+
+    def _extract(self) -> Iterator[str]:
+        """Extracts the text with the backend, yielding the lines as they are extracted.
 
         Details:
-            This method will delete the existing text file if it exists, then create a new one.
+            Long statements are split into chunks of pages that are extracted concurrently, then yielded
+            back in page order, so the text is the same as a single extraction of the whole range.
 
         Returns:
-            (list[str]) The text from the file.
+            (Iterator[str]) The raw lines of text.
         """
-        self.dump_text_file()
+        self._validate_range()
 
-        if not self.text_file.is_file():
-            raise FileNotFoundError(f"file not found: {self.text_file}")
+        ranges: list[tuple[int, int]] = self._page_ranges()
 
-        with open(self.text_file, "r", encoding="utf8") as f:
-            lines: list[str] = list(filter(None, [utils.replace_ligatures(line.strip("\n")).lstrip() for line in f.readlines()]))
+        if len(ranges) == 1:
+            yield from self._backend.extract(self.pdf_file, self._start, self._end, layout=self._layout, page_break=self._breaks)
+            return
 
-        return lines
+        workers: int = min(len(ranges), settings.get("workers") or os.cpu_count() or 1)
 
-    def _text_to_dict(self) -> dict[str, list[str]]:
-        """Converts the PDF text to a dictionary of pages and their text.
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures: list[Future] = [executor.submit(self._extract_range, start, end) for start, end in ranges]
+
+            for future in futures:
+                yield from future.result()
+
+    def _cache_key(self) -> str | None:
+        if _text_cache is None:
+            return None
+
+        return _text_cache.key(self.pdf_file, self._start, self._end, layout=self._layout, page_break=self._breaks,
+                               backend=self._backend.name, file_hash=self.file_hash)
+
+    def _read_text(self) -> Iterator[str]:
+        """Reads the raw lines of text from the PDF.
+
+        Details:
+            When the text cache is enabled, the text is read from the cache if this PDF was extracted
+            before. Otherwise the text is streamed from the backend in memory mode, or written to a text
+            file next to the PDF and read back.
 
         Returns:
-            (dict[str, list[str]]) The text from the file.
+            (Iterator[str]) The raw lines of text.
         """
-        text: list[str] = self._text_to_list()
+        key: str | None = self._cache_key()
+
+        if key is not None:
+            text: str | None = _text_cache.get(key)
 
-        dict_pages: dict[str, list[str]] = {}
-        page_blocks: list[tuple[int, int]] = []
+            if text is not None:
+                if self._save_pdf:
+                    self.text_file.write_text(text, encoding="utf8")
 
-        start_index: int | None = 0
+                yield from text.split("\n")
+                return
 
-        # the first iteration of the text determines the page breaks, this allows us to
-        # split the lines into logical pages, within the dictionary object.
-        for i, line in enumerate(text):
-            if not self._is_page_end(line):
+        # the text is only kept around when it has to be written to the cache or the text file
+        keep: bool = key is not None or self._save_pdf
+        lines: list[str] = []
+
+        if self._in_memory:
+            for line in self._extract():
+                if keep:
+                    lines.append(line)
+                yield line
+
+            if self._save_pdf:
+                self.text_file.write_text("".join(lines), encoding="utf8")
+        else:
+            self.dump_text_file()
+
+            if not self.text_file.is_file():
+                raise FileNotFoundError(f"file not found: {self.text_file}")
+
+            with open(self.text_file, "r", encoding="utf8") as f:
+                for line in f:
+                    if keep:
+                        lines.append(line)
+                    yield line
+
+            if not self._save_pdf:
+                self.text_file.unlink(missing_ok=True)
+
+        if key is not None:
+            _cache_put(key, "".join(lines))
+
+    @staticmethod
+    def _clean_lines(lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            line = utils.replace_ligatures(line.strip("\n")).lstrip()
+            if line:
+                yield line
+
+    def iter_lines(self) -> Iterator[str]:
+        """Yields the cleaned up lines of text from the PDF, skipping empty lines.
+
+        Returns:
+            (Iterator[str]) The lines of text.
+        """
+        return self._clean_lines(self._read_text())
+
+    async def _read_text_async(self, semaphore: asyncio.Semaphore | None = None) -> str:
+        """Reads the text from the PDF without blocking the event loop.
+
+        Details:
+            When the text cache is enabled, the text is read from the cache if this PDF was extracted
+            before. Otherwise the text is always extracted in memory, the page range chunks are
+            extracted concurrently. The hashing and the cache and text file I/O run in worker threads.
+
+        Args:
+            semaphore (asyncio.Semaphore, optional):  Held around each extraction, to cap the number of
+                extraction processes across every PDF being read. Default is None.
+
+        Returns:
+            (str) The text of the PDF.
+        """
+        self._validate_range()
+
+        key: str | None = await asyncio.to_thread(self._cache_key)
+
+        text: str | None = await asyncio.to_thread(_text_cache.get, key) if key is not None else None
+
+        if text is None:
+            async def _extract(start_page: int, end_page: int) -> list[str]:
+                async with semaphore or contextlib.nullcontext():
+                    return await self._backend.extract_async(self.pdf_file, start_page, end_page, layout=self._layout,
+                                                             page_break=self._breaks)
+
+            chunks: list[list[str]] = await asyncio.gather(*[_extract(start, end) for start, end in self._page_ranges()])
+            text = "".join(line for chunk in chunks for line in chunk)
+
+            if key is not None:
+                await asyncio.to_thread(_cache_put, key, text)
+
+        if self._save_pdf:
+            await asyncio.to_thread(self.text_file.write_text, text, encoding="utf8")
+
+        return text
+
+    async def lines_async(self, semaphore: asyncio.Semaphore | None = None) -> list[str]:
+        """Gets the cleaned up lines of text from the PDF without blocking the event loop.
+
+        Args:
+            semaphore (asyncio.Semaphore, optional):  Held around each extraction, see `_read_text_async`.
+                Default is None.
+
+        Returns:
+            (list[str]) The lines of text.
+        """
+        text: str = await self._read_text_async(semaphore)
+        return await asyncio.to_thread(lambda: list(self._clean_lines(text.split("\n"))))
+
+    async def load_async(self, semaphore: asyncio.Semaphore | None = None) -> dict[str, list[str]]:
+        """Extracts the pages without blocking the event loop, then caches them the same as `pages`.
+
+        Args:
+            semaphore (asyncio.Semaphore, optional):  Held around each extraction, see `_read_text_async`.
+                Default is None.
+
+        Returns:
+            (dict[str, list[str]]) The text from the PDF.
+        """
+        if "pages" not in self.__dict__:
+            lines: list[str] = await self.lines_async(semaphore)
+            self.__dict__["pages"] = await asyncio.to_thread(self._text_to_dict, lines)
+
+        return self.pages
+
+    def _segment(self, lines: Iterable[str]) -> Iterator[tuple[str, list[str]]]:
+        """Splits the lines of text into pages in a single pass, yielding each page as soon as its page end is found.
+
+        Details:
+            Each line is appended to its page as it is read, so the pages are never sliced out of a copy
+            of the text. Lines after the last page end, such as a final page without a footer, are kept
+            as one more page rather than dropped.
+
+        Args:
+            lines (Iterable[str]): The lines of text.
+
+        Returns:
+            (Iterator[tuple[str, list[str]]]) The page number and the text of the page.
+        """
+        is_page_end = self._re_page_end.search
+        page: list[str] = []
+        page_num: int = 0
+
+        for line in lines:
+            if not is_page_end(line):
+                page.append(line)
                 continue
 
-            page_blocks.append((start_index, i))
-            start_index = i + 1
+            page_num += 1
+            yield str(page_num), page
+            page = []
+
+        if page:
+            yield str(page_num + 1), page
 
-        # the second iteration runs over the page blocks we created in the first iteration.
-        # this allows us to inject the text blocks into the correct pages.
-        for i, pages in enumerate(page_blocks):
-            start, end = pages
-            dict_pages.setdefault(str(i+1), text[start:end])
+    def iter_pages(self) -> Iterator[tuple[str, list[str]]]:
+        """Yields each page of text as soon as its page end is found, so parsing can overlap the extraction.
 
-        if not self._save_pdf:
-            self.text_file.unlink(missing_ok=True)
+        Returns:
+            (Iterator[tuple[str, list[str]]]) The page number and the text of the page.
+        """
+        return self._segment(self.iter_lines())
 
-        return dict_pages
+    def _text_to_list(self) -> list[str]:
+        """Converts the PDF text to a list of strings.
+
+        Details:
+            This method will delete the existing text file if it exists, then create a new one.
+
+        Returns:
+            (list[str]) The text from the file.
+        """
+        return list(self.iter_lines())
+
+    def _text_to_dict(self, text: list[str] | None = None) -> dict[str, list[str]]:
+        """Converts the PDF text to a dictionary of pages and their text.
+
+        Args:
+            text (list[str]): Optional. The lines of text, these are extracted from the PDF when not passed.
+
+        Returns:
+            (dict[str, list[str]]) The text from the file.
+        """
+        return dict(self._segment(self.iter_lines() if text is None else text))
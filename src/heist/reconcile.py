@@ -0,0 +1,226 @@
+"""Heist: Reconciliation
+Statement periods overlap and statements get downloaded more than once, so the same transaction can be
+parsed from several files. The reconciler drops those repeats with a hash index keyed on the normalized
+bank, date, amount and description, and pairs up the two sides of a payment between accounts, in one
+pass over the merged transactions.
+"""
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from datetime import date
+
+from heist import logger, utils
+from heist.finance import TransactionType
+
+_logger = logger.get(__name__)
+
+# matches the descriptions of card payments and transfers between accounts
+_re_transfer: str = r"payment|pmt|autopay|transfer|xfer|thank you"
+
+_re_normalize: re.Pattern = re.compile(r"[^0-9a-z]+")
+
+
+def _cents(amount: float) -> int:
+    return round(abs(amount) * 100)
+
+
+def _day_number(date_str: str) -> int:
+    """Converts a date to a day number for measuring the days between two dates.
+
+    Dates without a year are treated as the same year and every month as 31 days, which is close
+    enough for a window of a few days. Statements date their transactions with the year of the
+    statement period, so a transfer from December to January is measured exactly.
+
+    Args:
+        date_str (str): The date string to convert. Example: "01/31", "2024-01-31".
+
+    Returns:
+        (int) The day number.
+    """
+    value: int = utils.date_to_int(date_str)
+    year, month_day = divmod(value, 10000)
+    month, day = divmod(month_day, 100)
+
+    if year:
+        return date(year, month, day).toordinal()
+
+    return month * 31 + day
+
+
+def transaction_key(transaction: TransactionType) -> tuple[str, str, int, str]:
+    """Gets the key that two copies of the same transaction share.
+
+    The description is lower cased with the punctuation and spacing removed, and the amount is
+    compared in whole cents, so small differences in how a statement was extracted do not matter.
+    The date includes the year of the statement period, so a charge repeated on the same day of
+    another year is not a copy.
+
+    Args:
+        transaction (Transaction): The transaction.
+
+    Returns:
+        (tuple[str, str, int, str]) The bank, date, amount in cents and description.
+    """
+    return (
+        transaction["bank"].strip().lower(),
+        transaction["date"],
+        _cents(transaction["amount"]),
+        _re_normalize.sub("", transaction["description"].lower()),
+    )
+
+
+class Reconciler:
+    """Removes repeated transactions and finds the transfers between accounts.
+
+    A transaction counts as a repeat only when another statement file already had it as many times.
+    Two identical purchases on one statement are both kept, but the same statement read twice, or two
+    statements with overlapping periods, keep only one copy of each. Transactions without a `source`
+    are never treated as repeats of each other.
+
+    Only a small tuple is kept for each transaction, not the transaction itself, so the transactions
+    can still be streamed. The transfers refer to the transactions by their row in the output of
+    `dedupe`, see `transfer_rows` to read them back.
+
+    Examples:
+        >> reconciler = Reconciler()
+        >> transactions = list(reconciler.dedupe(transactions))
+        >> transfers = transfer_rows(transactions, reconciler.transfers())
+    """
+
+    def __init__(self, transfer_days: int = 3, transfer_pattern: str = _re_transfer) -> None:
+        """Removes repeated transactions and finds the transfers between accounts.
+
+        Args:
+            transfer_days (int, optional):  The most days between the two sides of a transfer. Default is 3.
+            transfer_pattern (str, optional):  The pattern found in the description of at least one side of
+                a transfer. Default matches payments and transfers.
+        """
+        self._transfer_days: int = transfer_days
+        self._re_transfer: re.Pattern = re.compile(transfer_pattern, flags=re.IGNORECASE)
+
+        self._kept: dict[tuple, int] = defaultdict(int)
+        self._seen: dict[tuple, int] = defaultdict(int)
+        self._by_amount: dict[int, list[tuple[int, str, bool, int]]] = defaultdict(list)
+        self._rows: int = 0
+        self._dropped: int = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(transfer_days={self._transfer_days}, transfer_pattern={self._re_transfer.pattern!r})"
+
+    @property
+    def dropped(self) -> int:
+        """Returns the number of repeated transactions dropped by `dedupe`."""
+        return self._dropped
+
+    def dedupe(self, transactions: Iterable[TransactionType]) -> Iterator[TransactionType]:
+        """Yields the transactions, dropping the copies of a transaction already seen from another statement.
+
+        The transactions are streamed, the first copy of each is yielded in its original order.
+
+        Args:
+            transactions (Iterable[Transaction]): The merged transactions of every statement.
+
+        Returns:
+            (Iterator[Transaction]) The transactions without repeats.
+        """
+        kept, seen, by_amount = self._kept, self._seen, self._by_amount
+        dropped: int = 0
+
+        for transaction in transactions:
+            key: tuple = transaction_key(transaction)
+            source: str | None = getattr(transaction, "source", None)
+
+            # the count of this transaction in its own statement, against the most found in any statement
+            seen[key, source] += 1
+            if source is not None and seen[key, source] <= kept[key]:
+                dropped += 1
+                continue
+
+            kept[key] += 1
+
+            # day, bank, whether it reads like a transfer, and its row in the output
+            is_transfer: bool = self._re_transfer.search(transaction["description"]) is not None
+            by_amount[key[2]].append((_day_number(key[1]), key[0], is_transfer, self._rows))
+            self._rows += 1
+
+            yield transaction
+
+        self._dropped += dropped
+
+        if dropped:
+            _logger.info(f"Dropped {dropped} repeated transactions.")
+
+    def transfers(self) -> list[tuple[int, int]]:
+        """Pairs the transactions kept by `dedupe` that are the two sides of a transfer between accounts.
+
+        The two sides have the same amount, are from different banks, are at most `transfer_days` apart,
+        and at least one side reads like a payment or transfer. Each transaction is paired at most once.
+
+        Returns:
+            (list[tuple[int, int]]) The rows of the two sides of each transfer, in the output of `dedupe`.
+        """
+        pairs: list[tuple[int, int]] = []
+
+        # only transactions with the same amount are compared, so each comparison is within a small bucket
+        for bucket in self._by_amount.values():
+            if len(bucket) < 2 or not any(entry[2] for entry in bucket):
+                continue
+
+            bucket = sorted(bucket)
+            paired: set[int] = set()
+
+            # walking the bucket in date order, the search for the other side stops once it is out of the window
+            for position, (day, bank, is_transfer, row) in enumerate(bucket):
+                if row in paired:
+                    continue
+
+                for other_day, other_bank, other_is_transfer, other_row in bucket[position + 1:]:
+                    if other_day - day > self._transfer_days:
+                        break
+
+                    if other_row in paired or other_bank == bank or not (is_transfer or other_is_transfer):
+                        continue
+
+                    pairs.append((row, other_row))
+                    paired.update((row, other_row))
+                    break
+
+        return sorted(pairs)
+
+
+def transfer_rows(rows: Iterable[Mapping], pairs: list[tuple[int, int]]) -> list[dict]:
+    """Reads the two sides of each transfer back out of the rows written from `Reconciler.dedupe`.
+
+    Args:
+        rows (Iterable[Mapping]): The transactions in the order `dedupe` yielded them, Ex. the rows of the CSV file.
+        pairs (list[tuple[int, int]]): The pairs of rows from `Reconciler.transfers`.
+
+    Returns:
+        (list[dict]) Both sides of each transfer, with the number of their pair in the 'transfer' field.
+    """
+    numbers: dict[int, int] = {row: n for n, pair in enumerate(pairs, 1) for row in pair}
+    found: dict[int, dict] = {}
+
+    for row, transaction in enumerate(rows):
+        if row in numbers:
+            found[row] = {"transfer": numbers[row], **transaction}
+
+    return [found[row] for pair in pairs for row in pair if row in found]
+
+
+def reconcile(transactions: Iterable[TransactionType],
+              transfer_days: int = 3) -> tuple[list[TransactionType], list[tuple[TransactionType, TransactionType]]]:
+    """Removes the repeated transactions and finds the transfers between accounts, see `Reconciler`.
+
+    Args:
+        transactions (Iterable[Transaction]): The merged transactions of every statement.
+        transfer_days (int, optional):  The most days between the two sides of a transfer. Default is 3.
+
+    Returns:
+        (tuple[list[Transaction], list[tuple[Transaction, Transaction]]]) The transactions without repeats,
+            and the pairs of transfer transactions.
+    """
+    reconciler: Reconciler = Reconciler(transfer_days=transfer_days)
+    transactions = list(reconciler.dedupe(transactions))
+
+    return transactions, [(transactions[a], transactions[b]) for a, b in reconciler.transfers()]
@@ -0,0 +1,201 @@
+"""Heist: Extraction Service
+A long-lived pool of warm worker processes for parsing statements. Starting a worker process means
+starting an interpreter, importing heist and pypdf, and loading the settings, which on Windows is
+repeated for every pool. The service pays that cost once, then any number of folders and readers can
+submit statements to the same workers, in batches to cut the per-file round trips.
+"""
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from heist import backend, finance, logger, pdf, settings
+from heist.finance import TransactionType
+
+_logger = logger.get(__name__)
+
+
+def _warm(backend_name: str | None, cache_dir: str | Path | None, cache: bool = True) -> None:
+    """Loads the extraction machinery in a new worker process, so the first statement is not slowed by it.
+
+    Args:
+        backend_name (str, optional):  The name of the text extraction backend to load.
+        cache_dir (str | Path, optional):  The text cache folder used by the worker, None keeps the 'cache' setting.
+        cache (bool, optional):  Whether the worker uses the text cache at all. Default is True.
+    """
+    if not cache:
+        pdf.set_cache(None)
+    elif cache_dir is not None:
+        pdf.set_cache(cache_dir)
+
+    backend.get(backend_name).available()
+
+
+def parse_statement(statement: type[finance.BaseStatement], pdf_file: Path) -> list[TransactionType]:
+    """Parses a single statement PDF file, this runs inside of a worker process.
+
+    Args:
+        statement (type[BaseStatement]): The statement class used to parse the PDF file.
+        pdf_file (Path): The PDF file to parse.
+
+    Returns:
+        (list[Transaction]) The transaction details.
+    """
+    return list(statement(pdf_file, save_pdf=False).iter_transactions())
+
+
+def detect_and_parse(pdf_file: Path) -> tuple[type[finance.BaseStatement] | None, list[TransactionType]]:
+    """Detects the statement class of a PDF file from its first page, then parses it, this runs inside of
+    a worker process.
+
+    Args:
+        pdf_file (Path): The PDF file to parse.
+
+    Returns:
+        (tuple[type[BaseStatement] | None, list[Transaction]]) The detected statement class and the transaction
+            details, or None and no transactions when no statement class matches.
+    """
+    statement: type[finance.BaseStatement] | None = finance.detect_statement(pdf_file)
+
+    if statement is None:
+        return None, []
+
+    return statement, parse_statement(statement, pdf_file)
+
+
+def _parse_batch(routes: list[tuple[type[finance.BaseStatement], Path]]) -> list[list[TransactionType] | Exception]:
+    """Parses a batch of statements in a worker process.
+
+    A statement that fails to parse returns its exception in place of the transactions, so one bad PDF
+    does not lose the rest of the batch.
+
+    Args:
+        routes (list[tuple[type[BaseStatement], Path]]): The statement class and PDF file of each statement.
+
+    Returns:
+        (list[list[Transaction] | Exception]) The transaction details or the error of each statement.
+    """
+    results: list[list[TransactionType] | Exception] = []
+
+    for statement, pdf_file in routes:
+        try:
+            results.append(parse_statement(statement, pdf_file))
+        except Exception as e:
+            results.append(e)
+
+    return results
+
+
+class ExtractionService:
+    """A resident pool of warm worker processes that parses statements.
+
+    Examples:
+        >> with ExtractionService(workers=4) as service:
+        >>     checking = expense.read_statements(finance.ChaseChecking, "statements/chase", service=service)
+        >>     amazon = expense.read_statements(finance.ChaseCreditAmazon, "statements/amazon", service=service)
+    """
+
+    def __init__(self,
+                 workers: int | None = None,
+                 batch_size: int = 8,
+                 backend_name: str | None = None,
+                 cache_dir: str | Path | None = None,
+                 cache: bool = True) -> None:
+        """A resident pool of warm worker processes that parses statements.
+
+        Args:
+            workers (int, optional):  The number of worker processes. Default is the 'workers' setting, or every core.
+            batch_size (int, optional):  The number of statements sent to a worker at a time by `map`. Default is 8.
+            backend_name (str, optional):  The text extraction backend loaded by each worker. Default is the
+                'backend' setting.
+            cache_dir (str | Path, optional):  The text cache folder used by the workers. Default is the 'cache' setting.
+            cache (bool, optional):  Whether the workers use the text cache at all, False disables it no matter the
+                settings. Default is True.
+        """
+        workers = settings.get("workers") if workers is None else workers
+
+        self._workers: int = max(1, workers or os.cpu_count() or 1)
+        self._batch_size: int = max(1, batch_size)
+        self._executor: ProcessPoolExecutor = ProcessPoolExecutor(max_workers=self._workers,
+                                                                  initializer=_warm,
+                                                                  initargs=(backend_name, cache_dir, cache))
+        self._closed: bool = False
+
+        _logger.info(f"Started extraction service with {self._workers} workers.")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(workers={self._workers}, batch_size={self._batch_size})"
+
+    def __enter__(self) -> "ExtractionService":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def workers(self) -> int:
+        """Returns the number of worker processes."""
+        return self._workers
+
+    @property
+    def closed(self) -> bool:
+        """Returns True if the service has been closed."""
+        return self._closed
+
+    def submit(self, statement: type[finance.BaseStatement], pdf_file: Path) -> Future:
+        """Submits a single statement to the workers.
+
+        Args:
+            statement (type[BaseStatement]): The statement class used to parse the PDF file.
+            pdf_file (Path): The PDF file to parse.
+
+        Returns:
+            (Future) The future list of transaction details.
+        """
+        if self._closed:
+            raise RuntimeError("the extraction service is closed")
+
+        return self._executor.submit(parse_statement, statement, pdf_file)
+
+    def submit_detect(self, pdf_file: Path) -> Future:
+        """Submits a statement of unknown class to the workers, which detect its class and parse it.
+
+        Args:
+            pdf_file (Path): The PDF file to parse.
+
+        Returns:
+            (Future) The future statement class and list of transaction details, see `detect_and_parse`.
+        """
+        if self._closed:
+            raise RuntimeError("the extraction service is closed")
+
+        return self._executor.submit(detect_and_parse, pdf_file)
+
+    def map(self, routes: Iterable[tuple[type[finance.BaseStatement], Path]]) -> Iterator[list[TransactionType] | Exception]:
+        """Parses many statements, sending them to the workers in batches.
+
+        The results are yielded in the order of the routes, a statement that fails to parse yields its
+        exception instead of the transactions.
+
+        Args:
+            routes (Iterable[tuple[type[BaseStatement], Path]]): The statement class and PDF file of each statement.
+
+        Returns:
+            (Iterator[list[Transaction] | Exception]) The transaction details or the error of each statement.
+        """
+        if self._closed:
+            raise RuntimeError("the extraction service is closed")
+
+        routes = list(routes)
+        batches: list[list[tuple[type[finance.BaseStatement], Path]]] = [
+            routes[i:i + self._batch_size] for i in range(0, len(routes), self._batch_size)
+        ]
+
+        for results in self._executor.map(_parse_batch, batches):
+            yield from results
+
+    def close(self) -> None:
+        """Shuts down the worker processes, waiting for the submitted statements to finish."""
+        if not self._closed:
+            self._executor.shutdown(wait=True)
+            self._closed = True
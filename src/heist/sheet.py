@@ -1,8 +1,16 @@
 import csv
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack
 from pathlib import Path
 
-from heist import logger
+from heist import finance, logger, utils
 from heist.finance import TransactionType
+from heist.transaction import Transaction
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 _logger = logger.get(__name__)
 
@@ -17,32 +25,50 @@ def get_fields(data: list[dict], sort_list: list[str] | None) -> list[str]:
     Returns:
         (list[str]) The fields from the data sorted to match the sort_list if passed.
     """
-    fields: list[str] = []
+    fields: set[str] = set()
     for item in data:
-        fields.extend(list(item.keys()))
+        fields.update(item.keys())
+
+    return sort_fields(list(filter(None, fields)), sort_list)
+
 
-    fields = list(filter(None, set(fields)))
+def sort_fields(fields: list[str], sort_list: list[str] | None) -> list[str]:
+    """Sorts the fields to match the sort_list, fields missing from the sort_list go last.
 
+    Args:
+        fields (list[str]): The fields to sort.
+        sort_list (list[str], optional):  The list of fields to sort by. Default is None.
+
+    Returns:
+        (list[str]) The sorted fields.
+    """
     if sort_list is None:
         return fields
 
-    fields = sorted(fields, key=lambda x: sort_list.index(x) if x in sort_list else len(sort_list))
+    order: dict[str, int] = {field: i for i, field in enumerate(sort_list)}
 
-    return fields
+    return sorted(fields, key=lambda x: order.get(x, len(sort_list)))
 
 
-def write_csv(filename: str | Path, data: list[TransactionType], sort_list: list[str] | None = None) -> Path:
+def write_csv(filename: str | Path, data: Iterable[TransactionType], sort_list: list[str] | None = None) -> Path:
     """Writes the PDF data to a CSV file.
 
+    Details:
+        The header of a list is built from the keys of its rows. Any other iterable, like a generator,
+        is written as it is consumed with the header built from the statement schemas.
+
     Args:
-        data (list[dict]): The data to write to the CSV file.
+        data (Iterable[dict]): The data to write to the CSV file.
         filename (str | Path): The name of the CSV file.
         sort_list (list[str], optional):  The list of fields to sort by. Default is None.
 
     Returns:
         (Path) The path to the CSV file.
     """
-    field_names: list[str] = get_fields(data, sort_list=sort_list)
+    if isinstance(data, list):
+        field_names: list[str] = get_fields(data, sort_list=sort_list)
+    else:
+        field_names = sort_fields(finance.statement_fields(), sort_list)
 
     filename = Path(filename)
     filename.unlink(missing_ok=True)
@@ -50,7 +76,7 @@ def write_csv(filename: str | Path, data: list[TransactionType], sort_list: list
     _logger.info(f"Write CSV: {filename}")
 
     with open(filename, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=field_names, restval="null", dialect="excel")
+        writer = csv.DictWriter(f, fieldnames=field_names, restval="null", extrasaction="ignore", dialect="excel")
 
         # writing headers (field names)
         writer.writeheader()
@@ -59,3 +85,160 @@ def write_csv(filename: str | Path, data: list[TransactionType], sort_list: list
         writer.writerows(data)
 
     return filename
+
+
+def write_csv_many(filters: dict[str | Path, Callable[[TransactionType], bool] | None],
+                   data: Iterable[TransactionType],
+                   fields: list[str] | None = None,
+                   sort_list: list[str] | None = None,
+                   buffer_size: int = 1024 * 1024) -> list[Path]:
+    """Writes the PDF data to several CSV files in a single pass over the data.
+
+    Details:
+        Each row is written to every file whose filter accepts it. The header comes from the statement
+        schemas rather than scanning the rows, so the data may be any iterable, including a generator.
+
+    Args:
+        filters (dict[str | Path, Callable | None]): The filter of each CSV file, None writes every row to the file.
+        data (Iterable[dict]): The data to write to the CSV files.
+        fields (list[str], optional):  The CSV columns. Default is the fields of every statement class.
+        sort_list (list[str], optional):  The list of fields to sort by. Default is None.
+        buffer_size (int, optional):  The write buffer size of each file in bytes. Default is 1MB.
+
+    Returns:
+        (list[Path]) The paths to the CSV files.
+    """
+    field_names: list[str] = sort_fields(finance.statement_fields() if fields is None else fields, sort_list)
+    filenames: list[Path] = [Path(filename) for filename in filters]
+
+    with ExitStack() as stack:
+        writers: list[tuple[Callable | None, csv.DictWriter]] = []
+
+        for filename, row_filter in zip(filenames, filters.values()):
+            _logger.info(f"Write CSV: {filename}")
+
+            f = stack.enter_context(open(filename, "w", newline="", buffering=buffer_size))
+            writer = csv.DictWriter(f, fieldnames=field_names, restval="null", extrasaction="ignore", dialect="excel")
+            writer.writeheader()
+            writers.append((row_filter, writer))
+
+        for row in data:
+            for row_filter, writer in writers:
+                if row_filter is None or row_filter(row):
+                    writer.writerow(row)
+
+    return filenames
+
+
+def iter_csv(filename: str | Path) -> Iterator[dict[str, str]]:
+    """Reads the rows of a CSV file one at a time.
+
+    Args:
+        filename (str | Path): The name of the CSV file.
+
+    Returns:
+        (Iterator[dict[str, str]]) The rows of the CSV file.
+    """
+    with open(filename, "r", newline="") as f:
+        yield from csv.DictReader(f, dialect="excel")
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("numpy is required for the npz format, install it with 'uv sync --extra analytics'.")
+
+
+def write_npz(filename: str | Path, data: Iterable[TransactionType]) -> Path:
+    """Writes the PDF data to a compressed NumPy '.npz' file of typed columns.
+
+    Details:
+        The amounts are stored as float64 and the dates as int32, see `utils.date_to_int`. The bank
+        names are stored once, with an int32 code per row. Missing miles, merchants and categories are
+        stored as empty strings.
+
+    Args:
+        filename (str | Path): The name of the npz file, the '.npz' suffix is added if it is missing.
+        data (Iterable[dict]): The data to write to the npz file.
+
+    Returns:
+        (Path) The path to the npz file.
+    """
+    _require_numpy()
+
+    rows: list[TransactionType] = list(data)
+
+    # numpy appends the suffix when it is missing, so the returned path is the file actually written
+    filename = Path(filename)
+    if filename.suffix != ".npz":
+        filename = filename.with_name(f"{filename.name}.npz")
+
+    _logger.info(f"Write NPZ: {filename}")
+
+    banks, bank_codes = np.unique(np.array([row["bank"] for row in rows], dtype=str), return_inverse=True)
+
+    np.savez_compressed(
+        filename,
+        banks=banks,
+        bank=bank_codes.astype(np.int32),
+        date=np.fromiter((utils.date_to_int(row["date"]) for row in rows), dtype=np.int32, count=len(rows)),
+        description=np.array([row["description"] for row in rows], dtype=str),
+        amount=np.fromiter((row["amount"] for row in rows), dtype=np.float64, count=len(rows)),
+        miles=np.array([row.get("miles") or "" for row in rows], dtype=str),
+        merchant=np.array([row.get("merchant") or "" for row in rows], dtype=str),
+        category=np.array([row.get("category") or "" for row in rows], dtype=str),
+    )
+
+    return filename
+
+
+def read_npz(filename: str | Path) -> dict[str, "np.ndarray"]:
+    """Reads the typed columns of an npz file written by `write_npz`.
+
+    Args:
+        filename (str | Path): The name of the npz file.
+
+    Returns:
+        (dict[str, np.ndarray]) The 'bank', 'date', 'description', 'amount', 'miles', 'merchant' and 'category'
+            columns.
+    """
+    _require_numpy()
+
+    with np.load(filename, allow_pickle=False) as npz:
+        # files written before the merchant and category columns were added read them back as empty
+        empty: np.ndarray = np.full(len(npz["date"]), "", dtype=str)
+
+        return {
+            "bank": npz["banks"][npz["bank"]],
+            "date": npz["date"],
+            "description": npz["description"],
+            "amount": npz["amount"],
+            "miles": npz["miles"],
+            "merchant": npz["merchant"] if "merchant" in npz.files else empty,
+            "category": npz["category"] if "category" in npz.files else empty,
+        }
+
+
+def read_npz_transactions(filename: str | Path) -> list[Transaction]:
+    """Reads an npz file written by `write_npz` back into transactions.
+
+    Args:
+        filename (str | Path): The name of the npz file.
+
+    Returns:
+        (list[Transaction]) The transactions.
+    """
+    columns: dict[str, np.ndarray] = read_npz(filename)
+
+    return [
+        Transaction(bank, utils.int_to_date(date), description, amount, miles=miles or None, merchant=merchant or None,
+                    category=category or None)
+        for bank, date, description, amount, miles, merchant, category in zip(
+            columns["bank"].tolist(),
+            columns["date"].tolist(),
+            columns["description"].tolist(),
+            columns["amount"].tolist(),
+            columns["miles"].tolist(),
+            columns["merchant"].tolist(),
+            columns["category"].tolist(),
+        )
+    ]
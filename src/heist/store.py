@@ -0,0 +1,179 @@
+"""Heist: Transaction Store
+Remembers the transactions parsed from each statement PDF in a SQLite database. A statement is only
+parsed again when the PDF changes, or when the parser it was read with is updated, so repeat runs
+only pay for new statements.
+"""
+import json
+import sqlite3
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+
+from heist import logger
+from heist.transaction import Transaction
+
+_logger = logger.get(__name__)
+
+# the columns every transaction has, any other keys are stored as json in the 'extra' column
+_columns: tuple[str, ...] = ("bank", "date", "description", "amount")
+
+_schema: str = """
+CREATE TABLE IF NOT EXISTS statements (
+    path TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    parser TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    ingested TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    statement TEXT NOT NULL REFERENCES statements(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    bank TEXT,
+    date TEXT,
+    description TEXT,
+    amount REAL,
+    extra TEXT,
+    PRIMARY KEY (statement, position)
+);
+"""
+
+
+def _parser_name(statement: type) -> str:
+    return f"{statement.__module__}.{statement.__qualname__}"
+
+
+class TransactionStore:
+    """An on-disk store of the transactions parsed from statement PDF files.
+
+    Statements are keyed by their resolved path, and remember the hash of the PDF along with the
+    name and version of the parser that read them.
+    """
+
+    def __init__(self, filename: str | Path) -> None:
+        """An on-disk store of the transactions parsed from statement PDF files.
+
+        Args:
+            filename (str | Path): The path to the SQLite database, it is created if it does not exist.
+        """
+        self._filename: Path = Path(filename)
+        self._filename.parent.mkdir(parents=True, exist_ok=True)
+
+        # the async readers call the store from one worker thread at a time, rather than from the event loop
+        self._connection: sqlite3.Connection = sqlite3.connect(self._filename, check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_schema)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(filename={self._filename})"
+
+    def __enter__(self) -> "TransactionStore":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        self._connection.close()
+
+    @staticmethod
+    def _key(pdf_file: str | Path) -> str:
+        return Path(pdf_file).resolve().as_posix()
+
+    def is_current(self, pdf_file: str | Path, file_hash: str, statement: type) -> bool:
+        """Checks if the stored transactions for a PDF file are up to date.
+
+        Args:
+            pdf_file (str | Path): The path to the PDF file.
+            file_hash (str): The hash of the PDF file contents.
+            statement (type[BaseStatement]): The statement class the PDF file is parsed with.
+
+        Returns:
+            (bool) True if the PDF file was stored with the same hash and parser version, otherwise False.
+        """
+        row: tuple | None = self._connection.execute(
+            "SELECT hash, parser, version FROM statements WHERE path = ?", (self._key(pdf_file),)
+        ).fetchone()
+
+        if row is None:
+            return False
+
+        return row == (file_hash, _parser_name(statement), getattr(statement, "__parser_version__", 1))
+
+    def lookup(self, pdf_file: str | Path, file_hash: str, statements: Iterable[type]) -> type | None:
+        """Finds the statement class a PDF file was stored with, so a known statement is routed without
+        extracting any of its text.
+
+        Args:
+            pdf_file (str | Path): The path to the PDF file.
+            file_hash (str): The hash of the PDF file contents.
+            statements (Iterable[type[BaseStatement]]): The statement classes the PDF file may be parsed with.
+
+        Returns:
+            (type[BaseStatement] | None) The statement class, when the stored transactions are up to date for it,
+                otherwise None.
+        """
+        row: tuple | None = self._connection.execute(
+            "SELECT hash, parser, version FROM statements WHERE path = ?", (self._key(pdf_file),)
+        ).fetchone()
+
+        if row is None or row[0] != file_hash:
+            return None
+
+        for statement in statements:
+            if row[1:] == (_parser_name(statement), getattr(statement, "__parser_version__", 1)):
+                return statement
+
+        return None
+
+    def load(self, pdf_file: str | Path) -> list[Transaction | dict]:
+        """Loads the stored transactions for a PDF file.
+
+        Args:
+            pdf_file (str | Path): The path to the PDF file.
+
+        Returns:
+            (list[Transaction | dict]) The transaction details, in the order they were parsed. Rows with keys
+                a Transaction does not have, from custom statement classes, are loaded as dicts.
+        """
+        rows: list[tuple] = self._connection.execute(
+            "SELECT bank, date, description, amount, extra FROM transactions WHERE statement = ? ORDER BY position",
+            (self._key(pdf_file),)
+        ).fetchall()
+
+        transactions: list[Transaction | dict] = []
+
+        for row in rows:
+            transaction: dict = dict(zip(_columns, row[:-1]))
+            if row[-1]:
+                transaction.update(json.loads(row[-1]))
+            transactions.append(Transaction(**transaction) if transaction.keys() <= set(Transaction.fields) else transaction)
+
+        return transactions
+
+    def save(self, pdf_file: str | Path, file_hash: str, statement: type, transactions: list[Transaction | dict]) -> None:
+        """Replaces the stored transactions for a PDF file.
+
+        Args:
+            pdf_file (str | Path): The path to the PDF file.
+            file_hash (str): The hash of the PDF file contents.
+            statement (type[BaseStatement]): The statement class the PDF file was parsed with.
+            transactions (list[Transaction | dict]): The transactions parsed from the PDF file.
+        """
+        key: str = self._key(pdf_file)
+
+        rows: list[tuple] = []
+        for position, transaction in enumerate(transactions):
+            extra: dict = {k: v for k, v in transaction.items() if k not in _columns}
+            rows.append((key, position, *[transaction.get(c) for c in _columns], json.dumps(extra) if extra else None))
+
+        with self._connection:
+            self._connection.execute("DELETE FROM statements WHERE path = ?", (key,))
+            self._connection.execute(
+                "INSERT INTO statements (path, hash, parser, version, ingested) VALUES (?, ?, ?, ?, ?)",
+                (key, file_hash, _parser_name(statement), getattr(statement, "__parser_version__", 1), datetime.now().isoformat())
+            )
+            self._connection.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+        _logger.info(f"Stored {len(rows)} transactions: {pdf_file}")
@@ -0,0 +1,83 @@
+"""Heist: Transaction Record
+A compact record for a parsed transaction. It stores its fields in slots rather than a per-row dict,
+and interns the strings that repeat across rows, but still reads like the dict it replaces, so code
+written against `transaction["description"]` keeps working.
+"""
+import sys
+from collections.abc import Iterator, Mapping
+
+
+class Transaction(Mapping):
+    """A parsed transaction with dict-style read access.
+
+    Fields that are None, like `miles` on statements that do not earn miles, are left out of the
+    keys, the same as they were left out of the dict.
+
+    The `source` is the statement file the transaction was parsed from. It is not one of the fields,
+    so it is never written out, it lets reconciliation tell a repeated statement from a repeated purchase.
+    """
+
+    fields: tuple[str, ...] = ("bank", "date", "description", "amount", "miles", "merchant", "category")
+
+    __slots__ = fields + ("source",)
+
+    def __init__(self,
+                 bank: str,
+                 date: str,
+                 description: str,
+                 amount: float,
+                 miles: str | None = None,
+                 merchant: str | None = None,
+                 category: str | None = None,
+                 source: str | None = None) -> None:
+        """A parsed transaction with dict-style read access.
+
+        Args:
+            bank (str): The name of the bank.
+            date (str): The date of the transaction.
+            description (str): The description of the transaction.
+            amount (float): The amount of the transaction.
+            miles (str, optional):  The miles earned by the transaction. Default is None.
+            merchant (str, optional):  The canonical merchant name, see `merchant`. Default is None.
+            category (str, optional):  The category assigned by the category rules. Default is None.
+            source (str, optional):  The statement file the transaction was parsed from. Default is None.
+        """
+        # the bank and date repeat across thousands of rows, so every row shares the same string objects
+        self.bank: str = sys.intern(bank)
+        self.date: str = sys.intern(date)
+        self.description: str = description
+        self.amount: float = amount
+        self.miles: str | None = miles
+        self.merchant: str | None = merchant
+        self.category: str | None = category
+        self.source: str | None = source
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({', '.join([f'{k}={v!r}' for k, v in self.items()])})"
+
+    def __getitem__(self, key: str) -> str | float:
+        if key not in self.fields:
+            raise KeyError(key)
+
+        value = getattr(self, key)
+
+        if value is None:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key: str, value: str | float | None) -> None:
+        if key not in self.fields:
+            raise KeyError(key)
+
+        setattr(self, key, value)
+
+    def __iter__(self) -> Iterator[str]:
+        return (field for field in self.fields if getattr(self, field) is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> dict[str, str | float]:
+        """Returns the transaction as a dict."""
+        return dict(self.items())
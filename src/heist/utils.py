@@ -1,4 +1,12 @@
-import re
+import hashlib
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+
+def _strip_amount(text: str) -> str:
+    """Strips the currency symbols, separators and markers from an amount."""
+    # chained str.replace calls are several times faster than a regex or str.translate on these short strings
+    return text.replace(",", "").replace("$", "").replace(" ", "").replace("_", "").replace("*", "")
 
 
 def cast_float(text: str, absolute: bool = False) -> float:
@@ -11,10 +19,82 @@ def cast_float(text: str, absolute: bool = False) -> float:
     Returns:
         (float) The string as a float.
     """
-    value: float = float(re.sub(r"[$, _*]", "", text))
+    value: float = float(_strip_amount(text))
+    return abs(value) if absolute else value
+
+
+def cast_decimal(text: str, absolute: bool = False) -> Decimal:
+    """Casts the given string to an exact decimal.
+
+    Args:
+        text (str): The string to cast.
+        absolute (bool): Optional. Whether to return the absolute value of the decimal. Default is False.
+
+    Returns:
+        (Decimal) The string as a decimal.
+    """
+    try:
+        value: Decimal = Decimal(_strip_amount(text).strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid amount: {text}") from None
+
     return abs(value) if absolute else value
 
 
+def cast_cents(text: str, absolute: bool = False) -> int:
+    """Casts the given string to an integer number of cents, rounding half cents to even.
+
+    Args:
+        text (str): The string to cast.
+        absolute (bool): Optional. Whether to return the absolute value of the cents. Default is False.
+
+    Returns:
+        (int) The string as cents. Example: "-1,234.56" is -123456.
+    """
+    return int(cast_decimal(text, absolute=absolute).scaleb(2).to_integral_value())
+
+
+def file_hash(filename: str | Path, chunk_size: int = 1024 * 1024) -> str:
+    """Hashes the contents of a file.
+
+    Args:
+        filename (str | Path): The path to the file.
+        chunk_size (int): Optional. The number of bytes read at a time. Default is 1MB.
+
+    Returns:
+        (str) The SHA-256 hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+
+    with open(filename, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+# ligatures and symbols that pdftotext extracts, translated to plain characters in a single pass
+_ligatures: dict[int, str] = str.maketrans({
+    "ﬀ": "ff",
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬅ": "ft",
+    "ﬆ": "st",
+    "Ꜳ": "AA",
+    "Æ": "AE",
+    "ꜳ": "aa",
+    "â": "a",
+    "€": "E",
+    "¢": "c",
+    "•": "*",
+    "™": "TM",
+    "®": "(R)",
+    "©": "(C)",
+})
+
+
 def replace_ligatures(text: str) -> str:
     """Replaces ligatures with their respective characters.
 
@@ -24,71 +104,110 @@ def replace_ligatures(text: str) -> str:
     Returns:
         (str) The string with ligatures replaced.
     """
-    ligatures: dict[str, str] = {
-        "ﬀ": "ff",
-        "ﬁ": "fi",
-        "ﬂ": "fl",
-        "ﬃ": "ffi",
-        "ﬄ": "ffl",
-        "ﬅ": "ft",
-        "ﬆ": "st",
-        "Ꜳ": "AA",
-        "Æ": "AE",
-        "ꜳ": "aa",
-        "â": "a",
-        "€": "E",
-        "¢": "c",
-        "•": "*",
-        "™": "TM",
-        "®": "(R)",
-        "©": "(C)",
-    }
-
-    for search, replace in ligatures.items():
-        text = text.replace(search, replace)
-
-    return text
-
-
-def convert_date(date_str: str) -> str:
+    # none of the ligatures are ascii, and most statement lines are pure ascii
+    if text.isascii():
+        return text
+
+    return text.translate(_ligatures)
+
+
+# the month number of each month name, keyed by the first three letters, so abbreviated or spelled out
+# months both match.
+_months: dict[str, int] = {
+    "jan": 1,
+    "feb": 2,
+    "mar": 3,
+    "apr": 4,
+    "may": 5,
+    "jun": 6,
+    "jul": 7,
+    "aug": 8,
+    "sep": 9,
+    "oct": 10,
+    "nov": 11,
+    "dec": 12,
+}
+
+
+def convert_date(date_str: str, year: int | None = None) -> str:
     """Converts the spelled out/abbreviated date month to a numerical value.
 
     Args:
         date_str (str): The date string to convert. Example: "Jan 01", "January 01".
+        year (int): Optional. The year of the statement, when passed the date is returned in ISO format. Default is None.
 
     Returns:
-        (str) The date with numerals. Example: "01/01".
+        (str) The date with numerals. Example: "01/01", or "2024-01-01" when the year is passed.
     """
     values: list[str] = date_str.split(" ")
 
     if len(values) > 2:
-        month, day, year = values[0], values[1], values[2]
+        month, day, _ = values[0], values[1], values[2]
     elif len(values) == 2:
         month, day = values[0], values[1]
     else:
         raise ValueError(f"invalid date: {date_str}")
 
-    months: list[str] = [
-        "jan",
-        "feb",
-        "mar",
-        "apr",
-        "may",
-        "jun",
-        "jul",
-        "aug",
-        "sep",
-        "oct",
-        "nov",
-        "dec",
-    ]
-
-    # this is a more reliable way to match the month since I cannot guarantee
-    # that the month will be abbreviated or fully spelled out.
-    regex: re.Pattern = re.compile("|".join(months), flags=re.IGNORECASE)
-    find: re.Match | None = regex.match(month)
-
-    if find is None:
+    month_num: int | None = _months.get(month[:3].lower())
+
+    if month_num is None:
         raise ValueError(f"invalid month: {month}")
 
-    return f"{str(months.index(find.group().lower()) + 1).zfill(2)}/{day}"
+    if year is not None:
+        return f"{year:04}-{month_num:02}-{int(day):02}"
+
+    return f"{month_num:02}/{day}"
+
+
+def iso_date(date_str: str, year: int) -> str:
+    """Converts a numerical statement date to an ISO date, using the year of the statement.
+
+    Args:
+        date_str (str): The date string to convert. Example: "01/31".
+        year (int): The year of the statement.
+
+    Returns:
+        (str) The ISO date. Example: "2024-01-31".
+    """
+    month, day = date_str.split("/")[:2]
+    return f"{year:04}-{int(month):02}-{int(day):02}"
+
+
+def date_to_int(date_str: str) -> int:
+    """Converts a numerical date to an integer that sorts in date order.
+
+    Args:
+        date_str (str): The date string to convert. Example: "01/31", "01/31/2024", "2024-01-31".
+
+    Returns:
+        (int) The date as MMDD, or YYYYMMDD when the year is known. Example: 131, 20240131.
+    """
+    if "-" in date_str:
+        year, month, day = date_str.split("-")
+    else:
+        values: list[str] = date_str.split("/")
+        month, day, year = values[0], values[1], values[2] if len(values) > 2 else "0"
+
+    year_num: int = int(year)
+    if 0 < year_num < 100:
+        year_num += 2000
+
+    return year_num * 10000 + int(month) * 100 + int(day)
+
+
+def int_to_date(value: int) -> str:
+    """Converts an integer date from `date_to_int` back to a string.
+
+    Args:
+        value (int): The date as MMDD or YYYYMMDD.
+
+    Returns:
+        (str) The date as "MM/DD", or "YYYY-MM-DD" when the year is known.
+    """
+    year, month_day = divmod(int(value), 10000)
+    month, day = divmod(month_day, 100)
+
+    if year:
+        return f"{year:04}-{month:02}-{day:02}"
+
+    return f"{month:02}/{day:02}"
@@ -1,7 +1,14 @@
+import itertools
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
 from heist import expense, finance, settings, sheet
 from heist.finance import TransactionType
+from heist.matcher import Matcher
+from heist.merchant import MerchantTable
+from heist.reconcile import Reconciler, transfer_rows
+from heist.service import ExtractionService
+from heist.store import TransactionStore
 
 
 def main() -> None:
@@ -9,26 +16,49 @@ def main() -> None:
     statements: Path = settings['statements']
     statements.mkdir(parents=True, exist_ok=True)
 
-    # batch all transactions from multiple lenders into a list
-    transactions: list[TransactionType] = expense.get_chase_checking(statements.joinpath("chase"))
-    transactions.extend(expense.get_chase_amazon(statements.joinpath("amazon")))
-    transactions.extend(expense.get_barclays_arrivalplus(statements.joinpath("barclays")))
+    # previously parsed statements are loaded from the store instead of being parsed again
+    store: TransactionStore | None = TransactionStore(settings["store"]) if settings.get("store") else None
 
-    # wildcard search for transactions using a string or list of strings
-    vehicle_reg: list[dict] = finance.search_transactions("dmv", transactions)
-    amazon: list[dict] = finance.search_transactions(["amazon", "amzn"], transactions)
-    apple: list[dict] = finance.search_transactions("apple.com", transactions)
-    google: list[dict] = finance.search_transactions("google", transactions)
-    subscriptions: list[dict] = finance.search_transactions(["netflix", "openai", "hulu", "spotify"], transactions)
+    # one warm pool of workers is shared by every lender, instead of starting a pool per folder
+    service: ExtractionService = ExtractionService()
+
+    # stream the transactions from multiple lenders, they are parsed as the csv files are written
+    transactions: Iterator[TransactionType] = itertools.chain(
+        expense.iter_statements(finance.ChaseChecking, statements.joinpath("chase"), store=store, service=service),
+        expense.iter_statements(finance.ChaseCreditAmazon, statements.joinpath("amazon"), store=store, service=service),
+        expense.iter_statements(finance.BarclaysArrivalPlus, statements.joinpath("barclays"), store=store, service=service),
+    )
+
+    # overlapping and re-downloaded statements would count the same transaction twice
+    reconciler: Reconciler = Reconciler()
+    transactions = reconciler.dedupe(transactions)
+
+    # each distinct description is reduced to its merchant once, then remembered between runs
+    merchants: MerchantTable = MerchantTable(settings.get("merchants"))
+    transactions = merchants.apply(transactions)
+
+    # the category rules are compiled from the settings, each transaction gets its category in the same pass
+    categories: Matcher = settings.get("categories") or Matcher({})
+    transactions = categories.categorize(transactions)
+
+    # every csv file is written in a single pass over the transactions
+    filters: dict[Path, Callable[[TransactionType], bool] | None] = {statements.joinpath("all_transactions.csv"): None}
+    for name in categories.names:
+        filters[statements.joinpath(f"{name}.csv")] = lambda item, name=name: item.get("category") == name
 
     # csv column sort order based on transaction data
-    sort_list: list[str] = ["bank", "date", "description", "amount", "miles"]
-    sheet.write_csv(statements.joinpath("all_transactions.csv"), transactions, sort_list=sort_list)
-    sheet.write_csv(statements.joinpath("vehicle_registration.csv"), vehicle_reg, sort_list=sort_list)
-    sheet.write_csv(statements.joinpath("amazon.csv"), amazon, sort_list=sort_list)
-    sheet.write_csv(statements.joinpath("apple.csv"), apple, sort_list=sort_list)
-    sheet.write_csv(statements.joinpath("google.csv"), google, sort_list=sort_list)
-    sheet.write_csv(statements.joinpath("subscriptions.csv"), subscriptions, sort_list=sort_list)
+    sort_list: list[str] = ["bank", "date", "description", "merchant", "category", "amount", "miles"]
+    sheet.write_csv_many(filters, transactions, fields=finance.statement_fields() + ["merchant", "category"], sort_list=sort_list)
+    merchants.save()
+
+    # both sides of each payment between accounts, read back from the csv file rather than kept in memory
+    transfers: list[dict] = transfer_rows(sheet.iter_csv(statements.joinpath("all_transactions.csv")), reconciler.transfers())
+    sheet.write_csv(statements.joinpath("transfers.csv"), transfers, sort_list=["transfer"] + sort_list)
+
+    service.close()
+
+    if store is not None:
+        store.close()
 
 
 if __name__ == "__main__":